@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-from modules.auth_file import show_auth_page, get_current_user, logout
+from modules.auth_file import show_auth_page, get_current_user, logout, restore_session, get_user_profile
 from modules.books_csv import load_books, show_all_books, show_recommendations, show_reading_plan
 from modules.users_file import show_statistics, show_reminders, show_settings
 from modules.creative_file import show_creative_works
 from modules.utils import get_reading_time_recommendation, calculate_reading_plan
+from modules.migrations import ensure_schema
+from modules.repository import get_active_reminders
+from modules.reminders import REMINDER_SCHEDULER, start_reminder_scheduler
+from modules.profiler import profile_rerun
 
 import os
 from dotenv import load_dotenv
@@ -13,8 +17,20 @@ load_dotenv()
 print("DB_HOST:", os.getenv('DB_HOST'))
 print("DB_USER:", os.getenv('DB_USER'))
 
+# Main navigation: section label -> renderer taking (books_df, user)
+SECTIONS = {
+    "📚 Բոլոր Գրքերը": lambda books_df, user: show_all_books(books_df, user),
+    "💡 Առաջարկներ": lambda books_df, user: show_recommendations(books_df, user),
+    "📅 Ընթերցման Պլան": lambda books_df, user: show_reading_plan(books_df, user),
+    "📊 Իմ Վիճակագրությունը": lambda books_df, user: show_statistics(user),
+    "🎨 Ստեղծագործություններ": lambda books_df, user: show_creative_works(user),
+    "⏰ Հիշեցումներ": lambda books_df, user: show_reminders(user),
+    "⚙️ Կարգավորումներ": lambda books_df, user: show_settings(user, books_df)
+}
+
 def show_main_app(books_df):
-    user = st.session_state.user
+    # Preferences come from the process-wide profile cache, so every section sees the latest settings
+    user = get_user_profile(st.session_state.user['id']) or st.session_state.user
     
     # Header with user info and logout
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -27,37 +43,16 @@ def show_main_app(books_df):
     
     st.markdown("---")
     
-    # Main tabs
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📚 Բոլոր Գրքերը", 
-        "💡 Առաջարկներ", 
-        "📅 Ընթերցման Պլան",
-        "📊 Իմ Վիճակագրությունը",
-        "🎨 Ստեղծագործություններ",
-        "⏰ Հիշեցումներ",
-        "⚙️ Կարգավորումներ"
-    ])
-    
-    with tab1:
-        show_all_books(books_df, user)
-    
-    with tab2:
-        show_recommendations(books_df, user)
-    
-    with tab3:
-        show_reading_plan(books_df, user)
-    
-    with tab4:
-        show_statistics(user)
-    
-    with tab5:
-        show_creative_works(user)
-    
-    with tab6:
-        show_reminders(user)
+    # Only the selected section runs, unlike st.tabs which renders every tab on each rerun
+    section = st.radio(
+        "Բաժին",
+        list(SECTIONS),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="main_section"
+    )
     
-    with tab7:
-        show_settings(user, books_df)
+    SECTIONS[section](books_df, user)
 
 def main():
     st.set_page_config(
@@ -66,22 +61,37 @@ def main():
         layout="wide"
     )
     
-    # Initialize session state
-    if 'user' not in st.session_state:
-        st.session_state.user = None
-    if 'page' not in st.session_state:
-        st.session_state.page = "login"
-    if 'link_status' not in st.session_state:
-        st.session_state.link_status = {}
-    
-    # Load books data
-    books_df = load_books()
-    
-    # Navigation
-    if st.session_state.user is None:
-        show_auth_page(books_df)
-    else:
-        show_main_app(books_df)
+    # Opt-in timings of this run (PROFILE=1), shown in the sidebar
+    with profile_rerun():
+        # Initialize session state
+        if 'user' not in st.session_state:
+            st.session_state.user = None
+        if 'page' not in st.session_state:
+            st.session_state.page = "login"
+        
+        # A reload starts a fresh session; the signed token in the URL logs the user back in
+        if st.session_state.user is None:
+            restore_session()
+        
+        # Schema is checked once per process, not on every rerun
+        ensure_schema()
+        
+        # In-process reminder delivery for single-process deployments (REMINDER_SCHEDULER=app),
+        # otherwise `manage.py run-reminders` sends them; started once per process
+        if REMINDER_SCHEDULER == 'app':
+            try:
+                start_reminder_scheduler(get_active_reminders)
+            except Exception as e:
+                print(f"Error starting reminder scheduler: {e}")
+        
+        # Load books data
+        books_df = load_books()
+        
+        # Navigation
+        if st.session_state.user is None:
+            show_auth_page(books_df)
+        else:
+            show_main_app(books_df)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+"""Compare the vectorized recommendation scorer with the old iterrows version.
+
+Run from the repository root:
+    python -m benchmarks.bench_recommendations [sizes...]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from modules.utils import get_advanced_recommendations
+
+GENRES = ['Վեպ', 'Ֆենթեզի', 'Թրիլլեր', 'Դրամա', 'Գիտական', 'Սիրավեպ', 'Դետեկտիվ', 'Պատմական']
+LANGUAGES = ['Հայերեն', 'Ռուսերեն', 'Անգլերեն']
+PREFERENCES = {
+    'preferred_genres': ['Ֆենթեզի', 'Դետեկտիվ'],
+    'reading_speed': 2,
+    'daily_reading_time': 30,
+    'preferred_language': 'Հայերեն',
+    'preferred_page_range': [50, 400]
+}
+# The iterrows version takes minutes past this size
+REFERENCE_MAX_ROWS = 100_000
+
+def make_catalog(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'title': [f"Book {i}" for i in range(rows)],
+        'genre': rng.choice(GENRES, rows),
+        'pages': rng.integers(20, 1200, rows),
+        'language': rng.choice(LANGUAGES, rows)
+    })
+
+def reference_recommendations(books_df, user_preferences):
+    """The original row-by-row scorer, kept here as the correctness baseline"""
+    recommendations = []
+    for _, book in books_df.iterrows():
+        score = 0
+        if book['genre'] in user_preferences.get('preferred_genres', []):
+            score += 40
+        preferred_pages = user_preferences.get('preferred_page_range', [100, 300])
+        if preferred_pages[0] <= book['pages'] <= preferred_pages[1]:
+            score += 20
+        if book['language'] == user_preferences.get('preferred_language', 'Հայերեն'):
+            score += 15
+        estimated_time = book['pages'] / user_preferences.get('reading_speed', 2)
+        if estimated_time <= user_preferences.get('daily_reading_time', 30) * 7:
+            score += 25
+        recommendations.append((book, score))
+    recommendations.sort(key=lambda x: x[1], reverse=True)
+    return [book for book, score in recommendations[:5]]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main(sizes):
+    print(f"{'rows':>10} {'iterrows':>12} {'vectorized':>12} {'speedup':>9}")
+    for rows in sizes:
+        books_df = make_catalog(rows)
+        fast, fast_time = timed(get_advanced_recommendations, books_df, PREFERENCES)
+        if rows <= REFERENCE_MAX_ROWS:
+            slow, slow_time = timed(reference_recommendations, books_df, PREFERENCES)
+            assert [b['id'] for b in fast] == [b['id'] for b in slow], "results differ"
+            print(f"{rows:>10} {slow_time:>11.3f}s {fast_time:>11.4f}s {slow_time / fast_time:>8.0f}x")
+        else:
+            print(f"{rows:>10} {'-':>12} {fast_time:>11.4f}s {'-':>9}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
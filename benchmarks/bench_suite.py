@@ -0,0 +1,252 @@
+"""Benchmark the catalog, filtering, recommendations and data layer on synthetic data.
+
+Run from the repository root:
+    python -m benchmarks.bench_suite [--sizes 10000 100000 1000000] [--backends file sqlite mysql]
+                                     [--output results.json] [--compare baseline.json]
+
+Everything runs in a temporary working directory, so data/ of the checkout
+is never touched. The mysql backend writes synthetic users and activity to
+the database in DB_NAME; point it at a scratch database.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from streamlit.logger import set_log_level
+
+from benchmarks import synthetic
+
+# Data-layer workload per backend
+USERS = 200
+SESSIONS = 2000
+COMMENTS = 2000
+WORKS = 300
+READS = 200
+
+def measure(name, func, repeat=5, number=1, **params):
+    """Best/median/mean seconds per call of func over repeat rounds of number calls"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    result = {
+        'name': name,
+        **params,
+        'repeat': repeat,
+        'number': number,
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'mean_s': statistics.fmean(times)
+    }
+    print(f"{name:<40} {json.dumps(params, ensure_ascii=False):<28} {result['median_s'] * 1000:>10.3f} ms")
+    return result
+
+def measure_each(name, func, calls, **params):
+    """Seconds per call for a list of argument tuples run once each (writes can't be repeated)"""
+    start = time.perf_counter()
+    for args in calls:
+        func(*args)
+    per_call = (time.perf_counter() - start) / len(calls)
+    return measure_result(name, per_call, len(calls), **params)
+
+def measure_result(name, per_call, number, **params):
+    print(f"{name:<40} {json.dumps(params, ensure_ascii=False):<28} {per_call * 1000:>10.3f} ms")
+    return {'name': name, **params, 'repeat': 1, 'number': number,
+            'min_s': per_call, 'median_s': per_call, 'mean_s': per_call}
+
+def bench_catalog(rows):
+    from modules import catalog
+    from modules.books_csv import _load_books, load_books, search_books
+    from modules.search_index import SearchIndex
+    from modules.utils import get_advanced_recommendations
+
+    books_df = synthetic.make_catalog(rows)
+    raw_bytes = synthetic.catalog_csv_bytes(books_df)
+    results = [measure('catalog.parse_csv', lambda: catalog.parse_catalog_csv(raw_bytes), repeat=3, rows=rows)]
+
+    results.append(measure('catalog.ingest', lambda: catalog._write_snapshot(raw_bytes), repeat=3, rows=rows))
+    results.append(measure('catalog.load_snapshot', catalog.load_catalog, repeat=3, rows=rows))
+
+    def cold_load_books():
+        _load_books.clear()
+        return load_books()
+    results.append(measure('load_books.cold', cold_load_books, repeat=3, rows=rows))
+    books_df = load_books()
+    # Sessions now share one cached frame instead of each getting a copy, so a warm load
+    # is a dict lookup; report what that frame costs in memory instead
+    parsed_mb = catalog.parse_catalog_csv(raw_bytes).memory_usage(deep=True).sum() / 2 ** 20
+    compact_mb = books_df.memory_usage(deep=True).sum() / 2 ** 20
+    print(f"{'catalog.memory':<40} {json.dumps({'rows': rows}):<28} {parsed_mb:>8.1f} MB parsed, {compact_mb:.1f} MB compact")
+    book_ids = [(book_id,) for book_id in books_df['id'].iloc[::max(1, rows // 100)].tolist()]
+    results.append(measure_each('catalog.book_description', catalog.book_description, book_ids, rows=rows))
+
+    # st.cache_resource only keeps entries inside a Streamlit runtime, so build the index once here
+    results.append(measure('search_index.build', lambda: SearchIndex.build(books_df, fields=('title', 'author')),
+                           repeat=3, rows=rows))
+    index = SearchIndex.build(books_df, fields=('title', 'author'))
+
+    # The same filtering show_all_books does for its search boxes and genre select
+    title_query = books_df['title'].iloc[rows // 2].split()[0][:4]
+    author_query = books_df['author'].iloc[rows // 3].split()[-1][:5]
+    genre = synthetic.GENRES[0]
+    results.append(measure('filter.title', lambda: search_books(books_df, title_query, index=index),
+                           number=20, rows=rows))
+    results.append(measure('filter.author', lambda: search_books(books_df, "", author_query, index=index),
+                           number=20, rows=rows))
+    results.append(measure('filter.title_author',
+                           lambda: search_books(books_df, title_query, author_query, index=index),
+                           number=20, rows=rows))
+    results.append(measure('filter.genre', lambda: books_df[books_df['genre'] == genre], number=20, rows=rows))
+
+    preferences = {
+        'preferred_genres': synthetic.GENRES[:2],
+        'reading_speed': 2,
+        'daily_reading_time': 30,
+        'preferred_language': 'Հայերեն'
+    }
+    results.append(measure('recommendations', lambda: get_advanced_recommendations(books_df, preferences),
+                           number=5, rows=rows))
+    return results
+
+def bench_reading_plan():
+    from modules.utils import calculate_reading_plan
+
+    rng = np.random.default_rng(0)
+    args = [(int(p), int(s), int(d), int(t)) for p, s, d, t in zip(
+        rng.integers(20, 1200, 10_000), rng.integers(1, 6, 10_000),
+        rng.integers(15, 181, 10_000), rng.integers(1, 60, 10_000))]
+
+    def run():
+        for call in args:
+            calculate_reading_plan(*call)
+    result = measure('calculate_reading_plan.x10000', run)
+    return [result]
+
+def _seed_mysql_users(users):
+    from modules.mysql_db import db
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT IGNORE INTO users (id, username, email, password, reading_speed, daily_reading_time, "
+            "preferred_genres, preferred_language) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [(u['id'], f"bench_{u['username']}", f"bench_{u['email']}", '-', u['reading_speed'],
+              u['daily_reading_time'], json.dumps(u['preferred_genres'], ensure_ascii=False),
+              u['preferred_language']) for u in users]
+        )
+        conn.commit()
+        cursor.close()
+
+def load_backend(name):
+    """Import a data-layer module, preparing its storage first"""
+    from modules.repository import load_backend as load_data_backend
+    if name == 'mysql':
+        from modules.migrations import migrate
+        migrate()
+    return load_data_backend(name)
+
+def bench_data_layer(name):
+    try:
+        data = load_backend(name)
+    except Exception as e:
+        print(f"Skipping {name}: {e}")
+        return [{'name': f'{name}.skipped', 'reason': str(e)}]
+
+    books_df = synthetic.make_catalog(10_000)
+    users = synthetic.make_users(USERS)
+    if name == 'mysql':
+        _seed_mysql_users(users)
+    rng = np.random.default_rng(1)
+    user_ids = [int(i) for i in rng.choice([u['id'] for u in users], READS)]
+    book_batches = [[int(b) for b in rng.choice(books_df['id'], 20)] for _ in range(READS)]
+
+    results = [
+        measure_each(f'{name}.add_reading_session', data.add_reading_session,
+                     synthetic.make_sessions(users, books_df, SESSIONS)),
+        measure_each(f'{name}.add_book_comment', data.add_book_comment,
+                     synthetic.make_comments(users, books_df, COMMENTS)),
+        measure_each(f'{name}.add_creative_work', data.add_creative_work,
+                     synthetic.make_creative_works(users, WORKS))
+    ]
+    results.append(measure_each(f'{name}.get_user_sessions_page', data.get_user_sessions_page,
+                                [(user_id, 10) for user_id in user_ids]))
+    results.append(measure_each(f'{name}.get_user_stats', data.get_user_stats, [(user_id,) for user_id in user_ids]))
+    results.append(measure_each(f'{name}.get_comments_for_books', data.get_comments_for_books,
+                                [(batch,) for batch in book_batches], books=20))
+    results.append(measure_each(f'{name}.get_creative_works_feed', data.get_creative_works_feed,
+                                [(user_id, 10) for user_id in user_ids]))
+    work_ids = [work['id'] for work in data.get_creative_works(public_only=False)[:READS]]
+    results.append(measure_each(f'{name}.get_creative_work', data.get_creative_work,
+                                [(work_id,) for work_id in work_ids]))
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return None
+
+def compare(results, baseline_path):
+    """Print median ratios against an earlier results file; > 1 means slower now"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    key = lambda r: (r['name'], r.get('rows'))
+    previous = {key(r): r for r in baseline['results'] if 'median_s' in r}
+    print(f"\n{'benchmark':<40} {'rows':>9} {'ratio':>8}")
+    for result in results:
+        old = previous.get(key(result))
+        if old and 'median_s' in result and old['median_s']:
+            ratio = result['median_s'] / old['median_s']
+            flag = '  <-- slower' if ratio > 1.2 else ''
+            print(f"{result['name']:<40} {str(result.get('rows', '')):>9} {ratio:>7.2f}x{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='catalog sizes in rows')
+    parser.add_argument('--backends', nargs='*', default=['file', 'sqlite'], help='file, sqlite, mysql')
+    parser.add_argument('--output', default=None, help='results file (default: benchmarks/results-<time>.json)')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare with')
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), f"results-{datetime.now():%Y%m%d-%H%M%S}.json"))
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    # Isolated working directory; set before the app modules read their config
+    workdir = tempfile.mkdtemp(prefix='reading-app-bench-')
+    os.chdir(workdir)
+    os.environ.setdefault('CATALOG_REFRESH_INTERVAL', str(10 ** 9))
+    set_log_level('error')
+
+    results = []
+    for rows in args.sizes:
+        results += bench_catalog(rows)
+    results += bench_reading_plan()
+    for backend in args.backends:
+        results += bench_data_layer(backend)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+    if baseline:
+        compare(results, baseline)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
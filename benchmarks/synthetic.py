@@ -0,0 +1,133 @@
+"""Synthetic catalogs and user activity for the benchmarks.
+
+Catalogs have the columns of reading_app_db.csv, with titles, authors and
+descriptions in Armenian, Russian or English to match the row's language.
+"""
+import numpy as np
+import pandas as pd
+
+CATALOG_COLUMNS = ['id', 'title', 'author', 'type', 'genre', 'pages', 'language', 'publication_year', 'link', 'description']
+
+TYPES = ['Վեպ', 'Վիպակ', 'Ժողովածու', 'Պոեմ', 'Պիես', 'Դասագիրք', 'Աշխատություն', 'Հեքիաթ']
+GENRES = ['Ֆենթեզի', 'Թրիլլեր', 'Դրամա', 'Դետեկտիվ', 'Գիտական', 'Սիրավեպ', 'Պատմական',
+          'Փիլիսոփայական', 'Արկածային', 'Կենսագրություն', 'Սարսափ', 'Գիտաֆանտաստիկա']
+
+# language -> (title words, first names, last names, description words)
+TEXT = {
+    'Հայերեն': (
+        ['արև', 'լեռ', 'գետ', 'քաղաք', 'երազ', 'ճանապարհ', 'աստղ', 'այգի', 'ծով', 'լույս', 'ստվեր', 'տուն', 'գիրք', 'սիրտ'],
+        ['Արամ', 'Անի', 'Հովհաննես', 'Մարիամ', 'Գուրգեն', 'Նարինե', 'Վահան', 'Լուսինե'],
+        ['Թումանյան', 'Սարոյան', 'Իսահակյան', 'Չարենց', 'Զորյան', 'Շիրազ', 'Մաթևոսյան', 'Աբովյան'],
+        ['պատմություն', 'մասին', 'որը', 'բացահայտում', 'աշխարհը', 'հերոսի', 'կյանքը', 'և', 'նրա', 'ընտանիքի']
+    ),
+    'Ռուսերեն': (
+        ['солнце', 'гора', 'река', 'город', 'сон', 'дорога', 'звезда', 'сад', 'море', 'свет', 'тень', 'дом', 'книга', 'ёлка'],
+        ['Анна', 'Фёдор', 'Лев', 'Мария', 'Сергей', 'Ольга', 'Иван', 'Татьяна'],
+        ['Толстой', 'Достоевский', 'Чехов', 'Булгаков', 'Пушкин', 'Гоголь', 'Тургенев', 'Набоков'],
+        ['история', 'о', 'мире', 'героя', 'и', 'его', 'семьи', 'которая', 'раскрывает', 'жизнь']
+    ),
+    'Անգլերեն': (
+        ['sun', 'mountain', 'river', 'city', 'dream', 'road', 'star', 'garden', 'sea', 'light', 'shadow', 'house', 'book', 'heart'],
+        ['Jane', 'George', 'Mary', 'Charles', 'Virginia', 'Ernest', 'Agatha', 'Mark'],
+        ['Austen', 'Orwell', 'Shelley', 'Dickens', 'Woolf', 'Hemingway', 'Christie', 'Twain'],
+        ['a', 'story', 'about', 'the', 'world', 'of', 'a', 'hero', 'and', 'family']
+    )
+}
+LANGUAGES = list(TEXT)
+
+def _phrases(rng, words, count, length):
+    """count random phrases of `length` words, built column-wise so 1M rows stay fast"""
+    phrase = pd.Series(rng.choice(words, count))
+    for _ in range(length - 1):
+        phrase = phrase + ' ' + rng.choice(words, count)
+    return phrase.to_numpy()
+
+def make_catalog(rows, seed=0):
+    """A catalog DataFrame with the reading_app_db.csv schema"""
+    rng = np.random.default_rng(seed)
+    language = rng.choice(LANGUAGES, rows, p=[0.6, 0.25, 0.15])
+    title = np.empty(rows, dtype=object)
+    author = np.empty(rows, dtype=object)
+    description = np.empty(rows, dtype=object)
+    for lang, (title_words, first_names, last_names, description_words) in TEXT.items():
+        mask = language == lang
+        count = int(mask.sum())
+        words = _phrases(rng, title_words, count, 3)
+        title[mask] = pd.Series(words).str.capitalize().to_numpy()
+        author[mask] = _phrases(rng, first_names, count, 1) + ' ' + _phrases(rng, last_names, count, 1)
+        description[mask] = _phrases(rng, description_words, count, 12)
+    ids = np.arange(1, rows + 1)
+    return pd.DataFrame({
+        'id': ids,
+        'title': title,
+        'author': author,
+        'type': rng.choice(TYPES, rows),
+        'genre': rng.choice(GENRES, rows),
+        'pages': rng.integers(20, 1200, rows),
+        'language': language,
+        'publication_year': rng.integers(1850, 2025, rows),
+        'link': [f"https://example.org/books/{i}.pdf" for i in ids],
+        'description': description
+    }, columns=CATALOG_COLUMNS)
+
+def catalog_csv_bytes(books_df):
+    """Encode a catalog the way the bundled CSV is stored (UTF-8 with BOM)"""
+    return books_df.to_csv(index=False).encode('utf-8-sig')
+
+def make_users(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'id': i,
+            'username': f"reader{i}",
+            'email': f"reader{i}@example.org",
+            'reading_speed': int(rng.integers(1, 6)),
+            'daily_reading_time': int(rng.integers(15, 181)),
+            'preferred_genres': list(rng.choice(GENRES, 2, replace=False)),
+            'preferred_language': str(rng.choice(LANGUAGES))
+        }
+        for i in range(1, count + 1)
+    ]
+
+def make_sessions(users, books_df, count, seed=0):
+    """Reading sessions as add_reading_session argument tuples"""
+    rng = np.random.default_rng(seed)
+    user_ids = rng.choice([user['id'] for user in users], count)
+    rows = rng.integers(0, len(books_df), count)
+    titles = books_df['title'].to_numpy()
+    book_ids = books_df['id'].to_numpy()
+    return [
+        (int(user_id), int(book_ids[row]), int(rng.integers(5, 80)), int(rng.integers(10, 120)), titles[row])
+        for user_id, row in zip(user_ids, rows)
+    ]
+
+def make_comments(users, books_df, count, seed=0):
+    """Book comments as add_book_comment argument tuples"""
+    rng = np.random.default_rng(seed)
+    comment_words = TEXT['Հայերեն'][3] + TEXT['Ռուսերեն'][3]
+    text = _phrases(rng, comment_words, count, 8)
+    picked_users = rng.choice(users, count)
+    book_ids = rng.choice(books_df['id'].to_numpy(), count)
+    return [
+        (user['id'], int(book_id), text[i], int(rng.integers(1, 6)), user['username'])
+        for i, (user, book_id) in enumerate(zip(picked_users, book_ids))
+    ]
+
+def make_creative_works(users, count, seed=0):
+    """Creative works as add_creative_work argument tuples"""
+    rng = np.random.default_rng(seed)
+    picked_users = rng.choice(users, count)
+    works = []
+    for user in picked_users:
+        title_words, _, _, description_words = TEXT[user['preferred_language']]
+        works.append((
+            user['id'],
+            ' '.join(rng.choice(title_words, 2)).capitalize(),
+            str(rng.choice(['Բանաստեղծություն', 'Պատմվածք', 'Էսսե'])),
+            ' '.join(rng.choice(description_words, 200)),
+            str(rng.choice(GENRES)),
+            ' '.join(rng.choice(description_words, 10)),
+            bool(rng.random() < 0.8),
+            user['username']
+        ))
+    return works
@@ -0,0 +1,85 @@
+"""Maintenance commands for the reading app.
+
+Usage:
+    python manage.py migrate          Apply pending database migrations
+    python manage.py schema-version   Show the applied schema version
+    python manage.py compact-data     Compact the JSONL tables of the file backend
+    python manage.py backfill-stats   Rebuild per-user reading statistics from session history
+    python manage.py reindex-works    Rebuild the full-text search index of creative works
+    python manage.py run-reminders    Run the reminder scheduler as a standalone service
+"""
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def cmd_migrate(args):
+    from modules.migrations import migrate
+    applied = migrate()
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+
+def cmd_schema_version(args):
+    from modules.mysql_db import db
+    from modules.migrations import get_schema_version, latest_version
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        current = get_schema_version(cursor)
+        cursor.close()
+    print(f"Schema version {current} (latest {latest_version()})")
+
+def cmd_compact_data(args):
+    from modules.data_file import TABLE_INDEXES, get_table
+    for name in TABLE_INDEXES:
+        table = get_table(name)
+        table.compact()
+        print(f"{name}: {len(table.all())} records")
+
+def cmd_backfill_stats(args):
+    from modules.repository import load_backend
+    rebuilt = load_backend(args.backend).rebuild_user_stats(args.user)
+    print(f"Rebuilt reading statistics for {rebuilt} user(s)")
+
+def cmd_reindex_works(args):
+    from modules.repository import load_backend
+    from modules.works_search import rebuild_works_index
+    data = load_backend(args.backend)
+    works = data.get_creative_works(public_only=False)
+    comments_by_work = {work['id']: data.get_creative_work_comments(work['id']) for work in works}
+    print(f"Indexed {rebuild_works_index(works, comments_by_work)} creative works")
+
+def cmd_run_reminders(args):
+    import time
+    from modules.repository import load_backend
+    from modules.reminders import make_sink, start_reminder_scheduler
+    scheduler = start_reminder_scheduler(load_backend(args.backend).get_active_reminders, make_sink(args.sink))
+    print(f"Reminder scheduler running with the '{args.sink}' sink, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+def main():
+    from modules.repository import BACKENDS, DATA_BACKEND
+    backends = list(BACKENDS)
+    parser = argparse.ArgumentParser(description="Reading app maintenance commands")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help="apply pending database migrations").set_defaults(func=cmd_migrate)
+    commands.add_parser('schema-version', help="show the applied schema version").set_defaults(func=cmd_schema_version)
+    commands.add_parser('compact-data', help="compact the JSONL tables of the file backend").set_defaults(func=cmd_compact_data)
+    backfill = commands.add_parser('backfill-stats', help="rebuild per-user reading statistics from session history")
+    backfill.add_argument('--user', type=int, help="only rebuild this user id")
+    backfill.add_argument('--backend', choices=backends, default=DATA_BACKEND)
+    backfill.set_defaults(func=cmd_backfill_stats)
+    reindex = commands.add_parser('reindex-works', help="rebuild the full-text search index of creative works")
+    reindex.add_argument('--backend', choices=backends, default=DATA_BACKEND)
+    reindex.set_defaults(func=cmd_reindex_works)
+    run_reminders = commands.add_parser('run-reminders', help="run the reminder scheduler as a standalone service")
+    run_reminders.add_argument('--backend', choices=backends, default=DATA_BACKEND)
+    run_reminders.add_argument('--sink', choices=['file', 'smtp', 'queue'], default='file')
+    run_reminders.set_defaults(func=cmd_run_reminders)
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import bisect
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single process only
+    fcntl = None
+
+# Compact once superseded lines outnumber live records and there are at least this many
+COMPACT_MIN_DEAD = int(os.getenv('DATA_COMPACT_MIN_DEAD', 1000))
+DATA_FSYNC = os.getenv('DATA_FSYNC', '0') == '1'
+
+class AppendLog:
+    """Append-only JSONL table with an in-memory primary index and secondary indexes.
+
+    Every change is one appended line: {"op": "put", "record": {...}} or
+    {"op": "del", "id": n}. The whole log is replayed when the table is opened,
+    and lines appended by other processes are picked up on the next read.
+    Writers take an exclusive flock on a sidecar .lock file, so ids stay
+    unique and monotonic across processes. Compaction rewrites the log
+    with only live records and a {"op": "meta", "next_id": n} header, so
+    ids are never reused.
+    """
+
+    def __init__(self, name, index_fields=(), data_dir='data'):
+        self.name = name
+        self.path = os.path.join(data_dir, f'{name}.jsonl')
+        self.lock_path = self.path + '.lock'
+        self.legacy_path = os.path.join(data_dir, f'{name}.json')
+        self.index_fields = tuple(index_fields)
+        self._lock = threading.RLock()
+        os.makedirs(data_dir, exist_ok=True)
+        self._reset()
+        with self._lock:
+            self._import_legacy()
+            self._refresh()
+
+    def _reset(self):
+        self._records = {}  # id -> record, in insertion order
+        self._indexes = {field: {} for field in self.index_fields}  # field -> str(value) -> sorted [id]
+        self._next_id = 1
+        self._offset = 0
+        self._inode = None
+        self._dead = 0
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _import_legacy(self):
+        """One-time import of the old whole-file JSON list into the log"""
+        if os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        with self._file_lock():
+            if os.path.exists(self.path):
+                return
+            try:
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error importing {self.legacy_path}: {e}")
+                return
+            records, next_id = self._renumber_legacy(records)
+            self._write_snapshot(records, next_id)
+            # Replay what was written, a record lost here would be lost for good
+            self._refresh()
+            if len(self._records) != len(records):
+                os.remove(self.path)
+                self._reset()
+                raise ValueError(f"Importing {self.legacy_path} kept {len(self._records)} "
+                                 f"of {len(records)} records")
+
+    @staticmethod
+    def _renumber_legacy(records):
+        """Give every legacy record a unique id; returns (records, next_id).
+
+        The old whole-file tables reused ids after deletes (reminders got
+        len(reminders) + 1), and two puts with one id replay as one record.
+        The first record keeps its id, later ones with a missing or taken id
+        get new ids above the highest.
+        """
+        next_id = max([r['id'] for r in records if isinstance(r.get('id'), int)] + [0]) + 1
+        seen = set()
+        renumbered = []
+        for record in records:
+            if record.get('id') is None or record['id'] in seen:
+                record = {**record, 'id': next_id}
+                next_id += 1
+            seen.add(record['id'])
+            renumbered.append(record)
+        return renumbered, next_id
+
+    def _write_snapshot(self, records, next_id):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'meta', 'next_id': next_id}) + '\n')
+            for record in records:
+                f.write(json.dumps({'op': 'put', 'record': record}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _index_add(self, record):
+        for field in self.index_fields:
+            ids = self._indexes[field].setdefault(str(record.get(field)), [])
+            if not ids or ids[-1] < record['id']:
+                ids.append(record['id'])  # new ids are monotonic, the common case
+            else:
+                bisect.insort(ids, record['id'])
+
+    def _index_remove(self, record):
+        for field in self.index_fields:
+            ids = self._indexes[field].get(str(record.get(field)))
+            if ids:
+                i = bisect.bisect_left(ids, record['id'])
+                if i < len(ids) and ids[i] == record['id']:
+                    del ids[i]
+
+    def _apply(self, entry):
+        op = entry.get('op')
+        if op == 'meta':
+            self._next_id = max(self._next_id, entry['next_id'])
+        elif op == 'put':
+            record = entry['record']
+            previous = self._records.pop(record['id'], None)
+            if previous is not None:
+                self._index_remove(previous)
+                self._dead += 1
+            self._records[record['id']] = record
+            self._index_add(record)
+            if isinstance(record['id'], int):
+                self._next_id = max(self._next_id, record['id'] + 1)
+        elif op == 'del':
+            previous = self._records.pop(entry['id'], None)
+            if previous is not None:
+                self._index_remove(previous)
+            self._dead += 1
+
+    def _refresh(self):
+        """Replay lines appended since the last read; reload everything after a compaction"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # A writer may be mid-line, only consume complete lines
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+
+    def _append(self, entry):
+        # Caller holds self._lock and the file lock and has just refreshed
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            if DATA_FSYNC:
+                os.fsync(f.fileno())
+            if self._inode is None:
+                self._inode = os.fstat(f.fileno()).st_ino
+        self._offset += len(line)
+        self._apply(entry)
+
+    def insert(self, record):
+        """Append a new record, assigning the next id; returns the stored record"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            record = {'id': self._next_id, **record}
+            self._append({'op': 'put', 'record': record})
+        self._maybe_compact()
+        return record
+
+    def put(self, record):
+        """Insert or replace a record that already has an id"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._append({'op': 'put', 'record': record})
+        self._maybe_compact()
+        return record
+
+    def update(self, record_id, func):
+        """Atomically replace a record with func(current record or None), across processes too"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            record = {**func(self._records.get(record_id)), 'id': record_id}
+            self._append({'op': 'put', 'record': record})
+        self._maybe_compact()
+        return record
+
+    def delete(self, record_id):
+        with self._lock, self._file_lock():
+            self._refresh()
+            if record_id in self._records:
+                self._append({'op': 'del', 'id': record_id})
+        self._maybe_compact()
+
+    def get(self, record_id):
+        with self._lock:
+            self._refresh()
+            return self._records.get(record_id)
+
+    def find(self, field, value):
+        """Records whose indexed field equals value, in id order"""
+        with self._lock:
+            self._refresh()
+            ids = self._indexes[field].get(str(value), [])
+            return [self._records[record_id] for record_id in ids]
+
+    def last_id(self, field, value):
+        """Highest id among records whose indexed field equals value, None when there are none"""
+        with self._lock:
+            self._refresh()
+            ids = self._indexes[field].get(str(value))
+            return ids[-1] if ids else None
+
+    def find_page(self, field, value, limit, before_id=None, where=None):
+        """Up to limit records for an indexed value, newest id first, older than before_id.
+
+        where is an optional extra filter applied to each candidate record.
+        """
+        with self._lock:
+            self._refresh()
+            ids = self._indexes[field].get(str(value), [])
+            # Start right below before_id instead of walking past every newer id
+            end = len(ids) if before_id is None else bisect.bisect_left(ids, before_id)
+            page = []
+            for i in range(end - 1, -1, -1):
+                record = self._records[ids[i]]
+                if where is not None and not where(record):
+                    continue
+                page.append(record)
+                if len(page) == limit:
+                    break
+            return page
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return list(self._records.values())
+
+    def _maybe_compact(self):
+        if self._dead >= COMPACT_MIN_DEAD and self._dead > len(self._records):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with only live records"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._write_snapshot(list(self._records.values()), self._next_id)
+            self._reset()
+            self._refresh()
@@ -1,109 +1,172 @@
 import streamlit as st
 import hashlib
 import json
+import os
 from datetime import datetime
-from modules.mysql_db import db, init_database
+from modules.cache import TTLCache
+from modules.mysql_db import db
+from modules.queries import query, query_one, execute
+from modules.session_tokens import issue_token, read_token, revoke_token
+from modules.profiler import timed
+
+# Query parameter holding the signed session token, survives browser reloads
+SESSION_QUERY_PARAM = 'session'
+
+# Process-wide user profiles keyed by user id, written through by update_user_preferences
+_user_profiles = TTLCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', 1000)),
+    ttl=int(os.getenv('USER_CACHE_TTL', 600))
+)
+
+# Everything about a user except the password hash
+PROFILE_COLUMNS = ('id', 'username', 'email', 'reading_speed', 'daily_reading_time', 'preferred_genres',
+                   'preferred_language', 'created_at')
+PROFILE_QUERY = f"SELECT {', '.join(PROFILE_COLUMNS)} FROM users WHERE id = %s"
+# The hash is compared by the server and never sent back
+LOGIN_QUERY = f"SELECT {', '.join(PROFILE_COLUMNS)} FROM users WHERE username = %s AND password = %s"
+# Compared by the server so its collation decides, as the unique keys do
+TAKEN_QUERY = "SELECT username = %s AS username_taken FROM users WHERE username = %s OR email = %s"
+CREATE_USER_QUERY = """
+INSERT INTO users (username, email, password, reading_speed, daily_reading_time, preferred_genres, preferred_language)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+UPDATE_PREFERENCES_QUERY = """
+UPDATE users
+SET reading_speed = %s, daily_reading_time = %s, preferred_genres = %s, preferred_language = %s
+WHERE id = %s
+"""
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
+@timed(query=True)
 def create_user(username, email, password, reading_speed=2, daily_reading_time=30, preferred_genres=None, preferred_language='Հայերեն'):
     """Create new user in MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Check if username already exists
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        if cursor.fetchone():
-            st.error("❌ Այս օգտանունն արդեն գոյություն ունի")
-            cursor.close()
-            return False
-        
-        # Check if email already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            st.error("❌ Այս էլ․ փոստն արդեն գոյություն ունի")
-            cursor.close()
-            return False
-        
-        # Insert new user
-        query = """
-        INSERT INTO users (username, email, password, reading_speed, daily_reading_time, preferred_genres, preferred_language)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        genres_json = json.dumps(preferred_genres or [])
-        cursor.execute(query, (username, email, hash_password(password), reading_speed, daily_reading_time, genres_json, preferred_language))
-        conn.commit()
-        cursor.close()
-        return True
+        with db.connection() as conn:
+            # Check if username or email already exists, in one round trip
+            taken = query(conn, TAKEN_QUERY, (username, username, email))
+            if any(row.username_taken for row in taken):
+                st.error("❌ Այս օգտանունն արդեն գոյություն ունի")
+                return False
+            if taken:
+                st.error("❌ Այս էլ․ փոստն արդեն գոյություն ունի")
+                return False
+            
+            # Insert new user
+            genres_json = json.dumps(preferred_genres or [])
+            execute(conn, CREATE_USER_QUERY, (username, email, hash_password(password), reading_speed, daily_reading_time, genres_json, preferred_language))
+            conn.commit()
+            return True
         
     except Exception as e:
         st.error(f"❌ Սխալ գրանցման ընթացքում: {e}")
         return False
 
+@timed(query=True)
 def verify_user(username, password):
     """Verify user credentials from MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = "SELECT * FROM users WHERE username = %s AND password = %s"
-        cursor.execute(query, (username, hash_password(password)))
-        user = cursor.fetchone()
-        cursor.close()
-        
-        if user:
-            # Convert JSON string back to list
-            if user['preferred_genres']:
-                user['preferred_genres'] = json.loads(user['preferred_genres'])
-            else:
-                user['preferred_genres'] = []
-            
-            user['id'] = user['id']  # Use database ID
-            user['username'] = user['username']
-            return user
-        
-        return None
+        with db.connection() as conn:
+            row = query_one(conn, LOGIN_QUERY, (username, hash_password(password)))
+            return _profile(row) if row else None
         
     except Exception as e:
         st.error(f"❌ Սխալ մուտքագրման ընթացքում: {e}")
         return None
 
+def _profile(row):
+    """User dict from a PROFILE_COLUMNS row, with preferred_genres decoded from JSON"""
+    user = row._asdict()
+    user['preferred_genres'] = json.loads(user['preferred_genres']) if user['preferred_genres'] else []
+    return user
+
+def _cache_profile(user):
+    """Store a user without the password hash in the profile cache"""
+    profile = {key: value for key, value in user.items() if key != 'password'}
+    _user_profiles.set(profile['id'], profile)
+    return profile
+
+@timed(query=True)
+def get_user_profile(user_id):
+    """User profile from the cache, loaded from MySQL on a miss"""
+    profile = _user_profiles.get(user_id)
+    if profile is not None:
+        return profile
+    try:
+        with db.connection() as conn:
+            row = query_one(conn, PROFILE_QUERY, (user_id,))
+    except Exception as e:
+        print(f"Error loading user profile: {e}")
+        return None
+    if not row:
+        return None
+    return _cache_profile(_profile(row))
+
 def get_current_user():
     return st.session_state.get('user')
 
+def start_session(user):
+    """Log the user in and put a signed session token in the URL"""
+    user = _cache_profile(user)
+    token = issue_token(user)
+    st.session_state.user = user
+    st.session_state.session_token = token
+    st.session_state.page = "main"
+    st.experimental_set_query_params(**{SESSION_QUERY_PARAM: token})
+
+def restore_session():
+    """Log back in from the session token after a reload, without touching the database"""
+    token = st.experimental_get_query_params().get(SESSION_QUERY_PARAM, [None])[0]
+    if not token:
+        return None
+    user = read_token(token)
+    if user is None:
+        st.experimental_set_query_params()
+        return None
+    st.session_state.user = user
+    st.session_state.session_token = token
+    st.session_state.page = "main"
+    return user
+
+def refresh_session(user):
+    """Swap the session token for one carrying the updated profile"""
+    revoke_token(st.session_state.get('session_token'))
+    start_session(user)
+
 def logout():
+    revoke_token(st.session_state.pop('session_token', None))
+    st.experimental_set_query_params()
     st.session_state.user = None
     st.session_state.page = "login"
 
-def update_user_preferences(username, reading_speed, daily_reading_time, preferred_genres, preferred_language):
-    """Update user preferences in MySQL"""
+@timed(query=True)
+def update_user_preferences(user_id, reading_speed, daily_reading_time, preferred_genres, preferred_language):
+    """Update user preferences in MySQL and the profile cache, returns the updated profile"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        UPDATE users 
-        SET reading_speed = %s, daily_reading_time = %s, preferred_genres = %s, preferred_language = %s 
-        WHERE username = %s
-        """
-        
-        genres_json = json.dumps(preferred_genres or [])
-        cursor.execute(query, (reading_speed, daily_reading_time, genres_json, preferred_language, username))
-        conn.commit()
-        cursor.close()
-        return True
+        with db.connection() as conn:
+            genres_json = json.dumps(preferred_genres or [])
+            execute(conn, UPDATE_PREFERENCES_QUERY, (reading_speed, daily_reading_time, genres_json, preferred_language, user_id))
+            conn.commit()
         
     except Exception as e:
         st.error(f"❌ Սխալ կարգավորումները թարմացնելիս: {e}")
-        return False
+        return None
+    
+    # Write-through: the cached profile is replaced only after the commit succeeded
+    profile = get_user_profile(user_id)
+    if profile is None:
+        return None
+    return _cache_profile({
+        **profile,
+        'reading_speed': reading_speed,
+        'daily_reading_time': daily_reading_time,
+        'preferred_genres': list(preferred_genres or []),
+        'preferred_language': preferred_language
+    })
 
+@timed()
 def show_auth_page(books_df):
-    # Initialize database on first run
-    init_database()
-    
     st.title("🔐 Մուտք Գործել կամ Գրանցվել")
     
     tab1, tab2 = st.tabs(["🚪 Մուտք Գործել", "📝 Գրանցվել"])
@@ -117,8 +180,7 @@ def show_auth_page(books_df):
             if login_username.strip() and login_password.strip():
                 user = verify_user(login_username, login_password)
                 if user:
-                    st.session_state.user = user
-                    st.session_state.page = "main"
+                    start_session(user)
                     st.success(f"✅ Բարի գալուստ, {user['username']}!")
                     st.rerun()
                 else:
@@ -169,8 +231,7 @@ def show_auth_page(books_df):
                     # Get the newly created user
                     new_user = verify_user(reg_username, reg_password)
                     if new_user:
-                        st.session_state.user = new_user
-                        st.session_state.page = "main"
+                        start_session(new_user)
                         st.success("✅ Գրանցումը հաջող էր!")
                         st.rerun()
                     else:
@@ -1,23 +1,84 @@
 import streamlit as st
 import pandas as pd
 import requests
-from modules.utils import check_link_availability, calculate_reading_plan, get_reading_time_recommendation, get_advanced_recommendations
-from modules.data_file import add_reading_session, add_book_comment, get_book_comments
+import os
+from modules.utils import calculate_reading_plan, get_reading_time_recommendation, get_advanced_recommendations
+from modules.link_checker import get_link_prober
+from modules.catalog import load_catalog, catalog_version, book_description, current_ingest
+from modules.search_index import SearchIndex
+from modules.repository import add_reading_session, add_book_comment, get_book_comments, get_comments_for_books
+from modules.profiler import timed
 
-@st.cache_data
-def load_books():
-    """Load books from GitHub CSV"""
-    url = "https://raw.githubusercontent.com/galstyan11/reading-app/main/reading_app_db.csv"
-    
+BOOKS_PAGE_SIZES = [10, 20, 50, 100]
+BOOKS_PAGE_SIZE = int(os.getenv('BOOKS_PAGE_SIZE', 20))
+
+# One shared frame per catalog version; sessions get the same object, so it must not be modified
+@st.cache_resource(max_entries=2)
+def _load_books(version):
+    """Load one catalog version from the local snapshot"""
     try:
-        df = pd.read_csv(url, encoding='utf-8-sig')
-        df.columns = df.columns.str.strip()
+        df = load_catalog()
+        df.attrs['version'] = version
         st.success(f"✅ Բեռնված է {len(df)} գիրք")
         return df
     except Exception as e:
         st.error(f"Error loading books: {e}")
         return pd.DataFrame()
 
+@timed()
+def load_books():
+    """Load books, reloading only when the catalog version changes"""
+    try:
+        version = catalog_version()
+    except Exception as e:
+        st.error(f"Error loading books: {e}")
+        return pd.DataFrame()
+    if version is None:
+        # First start: the snapshot is still being ingested, serve the rows read so far
+        df = current_ingest().frame()
+        st.info(f"⏳ Գրքերի ցանկը բեռնվում է, առայժմ՝ {len(df)} գիրք")
+        return df
+    return _load_books(version)
+
+@st.cache_resource(max_entries=2)
+def get_search_index(version, _books_df):
+    """Build the title/author search index once per catalog version"""
+    # The ingest that wrote this version already indexed the same rows in the same order
+    ingest = current_ingest()
+    if ingest is not None and ingest.meta and ingest.meta['version'] == version and ingest.index.size == len(_books_df):
+        return ingest.index
+    return SearchIndex.build(_books_df, fields=('title', 'author'))
+
+def with_description(book):
+    """Copy of a book row as a dict, with its description read from the catalog"""
+    return {**book, 'description': book_description(book['id'])}
+
+def search_books(books_df, search_title="", search_author="", index=None):
+    """Filter books by title/author through the search index, best matches first"""
+    if not search_title and not search_author:
+        return books_df
+    if index is None:
+        ingest = current_ingest()
+        if books_df.attrs.get('partial') and ingest is not None:
+            index = ingest.index
+        else:
+            index = get_search_index(books_df.attrs.get('version'), books_df)
+    positions = None
+    if search_title:
+        positions = index.search('title', search_title)
+    if search_author:
+        author_hits = index.search('author', search_author)
+        if positions is None:
+            positions = author_hits
+        else:
+            allowed = set(author_hits)
+            positions = [position for position in positions if position in allowed]
+    if books_df.attrs.get('partial'):
+        # The ingest may have indexed rows this frame doesn't have yet
+        positions = [position for position in positions if position < len(books_df)]
+    return books_df.iloc[positions]
+
+@timed()
 def show_all_books(books_df, user):
     st.subheader("📚 Գրքերի Ամբողջական Ցանկ")
     
@@ -35,124 +96,164 @@ def show_all_books(books_df, user):
         selected_genre = st.selectbox("Ընտրել ժանր", ["Բոլորը"] + books_df['genre'].unique().tolist())
     
     # Filter books
-    filtered_books = books_df.copy()
-    if search_title:
-        filtered_books = filtered_books[filtered_books['title'].str.contains(search_title, case=False, na=False)]
-    if search_author:
-        filtered_books = filtered_books[filtered_books['author'].str.contains(search_author, case=False, na=False)]
+    filtered_books = search_books(books_df, search_title, search_author)
     if selected_genre != "Բոլորը":
         filtered_books = filtered_books[filtered_books['genre'] == selected_genre]
     
-    # Display books
-    for idx, (_, book) in enumerate(filtered_books.iterrows()):
-        with st.expander(f"📗 {book['title']} - {book['author']}"):
-            col1, col2 = st.columns([3, 2])
-            
-            with col1:
-                st.write(f"**ժանր:** {book['genre']}")
-                st.write(f"**Էջեր:** {book['pages']}")
-                st.write(f"**Լեզու:** {book['language']}")
-                
-                if pd.notna(book['description']) and book['description']:
-                    st.write(f"**Նկարագրություն:** {book['description']}")
-                
-                # PDF Link Section
-                st.write("---")
-                st.write("**📖 Կարդալ Գիրքը**")
-                
-                if pd.notna(book['link']) and book['link']:
-                    # Check link status if not already checked
-                    if book['id'] not in st.session_state.link_status:
-                        st.session_state.link_status[book['id']] = check_link_availability(book['link'])
-                    
-                    link_status = st.session_state.link_status[book['id']]
-                    
-                    if link_status:
-                        st.markdown(f"""
-                        <div style='background-color: #e8f5e8; padding: 10px; border-radius: 5px; border: 1px solid #4CAF50;'>
-                        <h4 style='color: #2E7D32; margin: 0;'>📚 Գիրքը Հասանելի է Առցանց</h4>
-                        <a href='{book['link']}' target='_blank' style='
-                            display: inline-block;
-                            background-color: #4CAF50;
-                            color: white;
-                            padding: 10px 20px;
-                            text-align: center;
-                            text-decoration: none;
-                            border-radius: 5px;
-                            margin: 10px 0;
-                            font-weight: bold;
-                        '>📖 Բացել Գիրքը</a>
-                        <p style='margin: 5px 0; color: #555;'>Կարդալու համար սեղմեք <<Բացել գիրքը>> </p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.error("❌ PDF հղումը չի աշխատում")
-                        st.markdown(f"[🔗 Փորձել արտաքին հղումը]({book['link']})")
-                else:
-                    st.warning("⚠️ Այս գրքի համար PDF հղում չկա")
-                
-                # Reading session tracking
-                st.write("---")
-                st.write("📖 Ընթերցման Հետևում")
-                pages_read = st.number_input(
-                    "Կարդացած էջեր",
-                    min_value=0,
-                    max_value=book['pages'],
-                    value=0,
-                    key=f"pages_{book['id']}_{idx}"
-                )
-                reading_time = st.number_input(
-                    "Ընթերցման ժամանակ (րոպե)",
-                    min_value=0,
-                    max_value=480,
-                    value=0,
-                    key=f"time_{book['id']}_{idx}"
-                )
-                
-                if st.button("💾 Պահպանել Ընթերցումը", key=f"save_{book['id']}_{idx}"):
-                    if pages_read > 0 and reading_time > 0:
-                        success = add_reading_session(user['id'], book['id'], pages_read, reading_time, book['title'])
-                        if success:
-                            st.success("Տվյալները պահպանված են!")
-            
-            with col2:
-                # Book metrics and info
-                st.write("**📊 Գրքի Մասին**")
-                
-                # Reading time estimation
-                total_minutes = book['pages'] // user['reading_speed']
-                hours = total_minutes // 60
-                minutes = total_minutes % 60
-                
-                if hours > 0:
-                    st.metric("⏱️ Ընդհանուր Ժամանակ", f"{hours}ժ {minutes}ր")
-                else:
-                    st.metric("⏱️ Ընդհանուր Ժամանակ", f"{minutes} րոպե")
-                
-                # Daily reading plan
-                daily_pages, daily_minutes = calculate_reading_plan(
-                    book['pages'], user['reading_speed'], user['daily_reading_time'], 30
-                )
-                st.metric("📅 Օրական Պլան", f"{daily_pages} էջ")
-                
-                # Reading time recommendation based on genre
-                recommendation = get_reading_time_recommendation(book['genre'])
-                st.info(f"{recommendation['icon']} **Առաջարկվող ընթերցման ժամանակ:** {recommendation['time']}")
-                
-                # Additional book info
-                if pd.notna(book['publication_year']):
-                    st.write(f"**📅 Հրատարակման Տարի:** {int(book['publication_year'])}")
+    # Paginate so only one page of light rows is rendered per rerun
+    page_size_options = sorted(set(BOOKS_PAGE_SIZES + [BOOKS_PAGE_SIZE]))
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox(
+            "Գրքեր էջում",
+            page_size_options,
+            index=page_size_options.index(BOOKS_PAGE_SIZE),
+            key="books_page_size"
+        )
+    page_count = max(1, -(-len(filtered_books) // page_size))
+    filters = (search_title, search_author, selected_genre, page_size)
+    if st.session_state.get('books_filters') != filters or st.session_state.get('books_page', 1) > page_count:
+        st.session_state.books_filters = filters
+        st.session_state.books_page = 1
+    with col2:
+        page = st.number_input("Էջ", min_value=1, max_value=page_count, key="books_page")
+    with col3:
+        st.write("")
+        st.caption(f"Գտնվել է {len(filtered_books)} գիրք • էջ {page}/{page_count}")
+    
+    start = (page - 1) * page_size
+    page_books = filtered_books.iloc[start:start + page_size]
+    
+    # Probe the visible links in one concurrent batch instead of one by one
+    get_link_prober().prefetch(page_books['link'].dropna().tolist())
+    
+    # Display books; heavy widgets are built only for the opened book
+    open_book_id = st.session_state.get('open_book_id')
+    for book in page_books.to_dict('records'):
+        is_open = book['id'] == open_book_id
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write(f"📗 **{book['title']}** - {book['author']} • {book['genre']} • {book['pages']} էջ")
+        with col2:
+            if st.button("🔼 Փակել" if is_open else "🔽 Բացել", key=f"toggle_book_{book['id']}"):
+                st.session_state.open_book_id = None if is_open else book['id']
+                st.rerun()
+        if is_open:
+            with st.container():
+                show_book_details(with_description(book), user)
+            st.markdown("---")
+
+@timed()
+def show_book_details(book, user):
+    """Show full info, reading tracker and comments for one opened book"""
+    col1, col2 = st.columns([3, 2])
+    
+    with col1:
+        st.write(f"**ժանր:** {book['genre']}")
+        st.write(f"**Էջեր:** {book['pages']}")
+        st.write(f"**Լեզու:** {book['language']}")
+        
+        if pd.notna(book['description']) and book['description']:
+            st.write(f"**Նկարագրություն:** {book['description']}")
+        
+        # PDF Link Section
+        st.write("---")
+        st.write("**📖 Կարդալ Գիրքը**")
+        
+        if pd.notna(book['link']) and book['link']:
+            link_status = get_link_prober().status(book['link'])
             
-            # Comments Section for the book
-            st.write("---")
-            show_book_comments_section(book['id'], user, f"all_books_{book['id']}_{idx}")
+            if link_status is None:
+                st.info("⏳ Հղումը ստուգվում է...")
+                st.markdown(f"[🔗 Բացել հղումը]({book['link']})")
+            elif link_status:
+                st.markdown(f"""
+                <div style='background-color: #e8f5e8; padding: 10px; border-radius: 5px; border: 1px solid #4CAF50;'>
+                <h4 style='color: #2E7D32; margin: 0;'>📚 Գիրքը Հասանելի է Առցանց</h4>
+                <a href='{book['link']}' target='_blank' style='
+                    display: inline-block;
+                    background-color: #4CAF50;
+                    color: white;
+                    padding: 10px 20px;
+                    text-align: center;
+                    text-decoration: none;
+                    border-radius: 5px;
+                    margin: 10px 0;
+                    font-weight: bold;
+                '>📖 Բացել Գիրքը</a>
+                <p style='margin: 5px 0; color: #555;'>Կարդալու համար սեղմեք <<Բացել գիրքը>> </p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.error("❌ PDF հղումը չի աշխատում")
+                st.markdown(f"[🔗 Փորձել արտաքին հղումը]({book['link']})")
+        else:
+            st.warning("⚠️ Այս գրքի համար PDF հղում չկա")
+        
+        # Reading session tracking
+        st.write("---")
+        st.write("📖 Ընթերցման Հետևում")
+        pages_read = st.number_input(
+            "Կարդացած էջեր",
+            min_value=0,
+            max_value=book['pages'],
+            value=0,
+            key=f"pages_{book['id']}"
+        )
+        reading_time = st.number_input(
+            "Ընթերցման ժամանակ (րոպե)",
+            min_value=0,
+            max_value=480,
+            value=0,
+            key=f"time_{book['id']}"
+        )
+        
+        if st.button("💾 Պահպանել Ընթերցումը", key=f"save_{book['id']}"):
+            if pages_read > 0 and reading_time > 0:
+                success = add_reading_session(user['id'], book['id'], pages_read, reading_time, book['title'])
+                if success:
+                    st.success("Տվյալները պահպանված են!")
+    
+    with col2:
+        # Book metrics and info
+        st.write("**📊 Գրքի Մասին**")
+        
+        # Reading time estimation
+        total_minutes = book['pages'] // user['reading_speed']
+        hours = total_minutes // 60
+        minutes = total_minutes % 60
+        
+        if hours > 0:
+            st.metric("⏱️ Ընդհանուր Ժամանակ", f"{hours}ժ {minutes}ր")
+        else:
+            st.metric("⏱️ Ընդհանուր Ժամանակ", f"{minutes} րոպե")
+        
+        # Daily reading plan
+        daily_pages, daily_minutes = calculate_reading_plan(
+            book['pages'], user['reading_speed'], user['daily_reading_time'], 30
+        )
+        st.metric("📅 Օրական Պլան", f"{daily_pages} էջ")
+        
+        # Reading time recommendation based on genre
+        recommendation = get_reading_time_recommendation(book['genre'])
+        st.info(f"{recommendation['icon']} **Առաջարկվող ընթերցման ժամանակ:** {recommendation['time']}")
+        
+        # Additional book info
+        if pd.notna(book['publication_year']):
+            st.write(f"**📅 Հրատարակման Տարի:** {int(book['publication_year'])}")
+    
+    # Comments Section for the book
+    st.write("---")
+    show_book_comments_section(book['id'], user, f"all_books_{book['id']}")
 
-def show_book_comments_section(book_id, user, unique_suffix=""):
-    """Show comments section for a specific book"""
+@timed()
+def show_book_comments_section(book_id, user, unique_suffix="", comments=None):
+    """Show comments section for a specific book, comments can be prefetched by the caller"""
     st.subheader("💬 Մեկնաբանություններ")
     
     # Get existing comments
-    comments = get_book_comments(book_id)
+    if comments is None:
+        comments = get_book_comments(book_id)
     
     # Display existing comments
     if comments:
@@ -191,6 +292,7 @@ def show_book_comments_section(book_id, user, unique_suffix=""):
             else:
                 st.error("❌ Չհաջողվեց ավելացնել մեկնաբանությունը")
 
+@timed()
 def show_recommendations(books_df, user):
     st.subheader("💡 Անհատականացված Առաջարկներ")
     
@@ -207,11 +309,15 @@ def show_recommendations(books_df, user):
         'preferred_page_range': [50, 400]
     }
     
-    recommendations = get_advanced_recommendations(books_df, user_preferences)
+    recommendations = [with_description(book) for book in get_advanced_recommendations(books_df, user_preferences)]
     
     if recommendations:
+        get_link_prober().prefetch([book['link'] for book in recommendations if pd.notna(book['link']) and book['link']])
         st.success(f"✅ Գտնվել է {len(recommendations)} առաջարկվող գիրք")
         
+        # One query for the comments of every recommended book
+        comments_by_book = get_comments_for_books([book['id'] for book in recommendations])
+        
         for idx, book in enumerate(recommendations):
             with st.container():
                 col1, col2 = st.columns([3, 1])
@@ -233,13 +339,11 @@ def show_recommendations(books_df, user):
                     
                     # PDF Link in recommendations too
                     if pd.notna(book['link']) and book['link']:
-                        # Check link status if not already checked
-                        if book['id'] not in st.session_state.link_status:
-                            st.session_state.link_status[book['id']] = check_link_availability(book['link'])
+                        link_status = get_link_prober().status(book['link'])
                         
-                        link_status = st.session_state.link_status[book['id']]
-                        
-                        if link_status:
+                        if link_status is None:
+                            st.caption("⏳ Հղումը ստուգվում է...")
+                        elif link_status:
                             st.markdown(f"""
                             <a href='{book['link']}' target='_blank' style='
                                 display: inline-block;
@@ -271,12 +375,13 @@ def show_recommendations(books_df, user):
                     st.metric("📅 Օրական պլան", f"{daily_pages} էջ")
                 
                 # Comments section for recommended books too
-                show_book_comments_section(book['id'], user, f"rec_{book['id']}_{idx}")
+                show_book_comments_section(book['id'], user, f"rec_{book['id']}_{idx}", comments_by_book[book['id']])
                 
                 st.markdown("---")
     else:
         st.info("ℹ️ Չգտնվեցին առաջարկվող գրքեր։ Ստուգեք ձեր նախընտրությունները կարգավորումներում։")
 
+@timed()
 def show_reading_plan(books_df, user):
     st.subheader("📅 Ընթերցման Պլանավորում")
     
@@ -307,13 +412,11 @@ def show_reading_plan(books_df, user):
         
         # PDF Link in reading plan section too
         if pd.notna(book_info['link']) and book_info['link']:
-            # Check link status if not already checked
-            if book_info['id'] not in st.session_state.link_status:
-                st.session_state.link_status[book_info['id']] = check_link_availability(book_info['link'])
-            
-            link_status = st.session_state.link_status[book_info['id']]
+            link_status = get_link_prober().status(book_info['link'])
             
-            if link_status:
+            if link_status is None:
+                st.caption("⏳ Հղումը ստուգվում է...")
+            elif link_status:
                 st.markdown(f"""
                 <a href='{book_info['link']}' target='_blank' style='
                     display: inline-block;
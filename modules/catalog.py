@@ -0,0 +1,484 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+import requests
+from modules.search_index import SearchIndex
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATALOG_SOURCE_URL = os.getenv(
+    'CATALOG_SOURCE_URL',
+    "https://raw.githubusercontent.com/galstyan11/reading-app/main/reading_app_db.csv"
+)
+CATALOG_LOCAL_CSV = os.getenv('CATALOG_LOCAL_CSV', os.path.join(BASE_DIR, 'reading_app_db.csv'))
+CATALOG_SNAPSHOT = os.getenv('CATALOG_SNAPSHOT', os.path.join('data', 'catalog.pkl'))
+# Derived from the snapshot header plus when upstream was last checked
+CATALOG_META = CATALOG_SNAPSHOT + '.meta.json'
+# Descriptions live outside the frame and are read one book at a time
+CATALOG_DESCRIPTIONS = CATALOG_SNAPSHOT + '.descriptions'
+# Bumped when the snapshot layout changes, older snapshots are rebuilt
+CATALOG_SNAPSHOT_FORMAT = 4
+CATALOG_REFRESH_INTERVAL = int(os.getenv('CATALOG_REFRESH_INTERVAL', 60 * 60))
+# Rows read from the CSV at a time; bounds the memory used on top of the compact frame
+CATALOG_CHUNK_SIZE = int(os.getenv('CATALOG_CHUNK_SIZE', 20000))
+
+# Repeated text columns, stored dictionary-encoded
+CATEGORY_COLUMNS = ('type', 'genre', 'language', 'author')
+
+_refresh_lock = threading.Lock()
+_refresh_running = False
+_descriptions = None
+_descriptions_lock = threading.Lock()
+_ingest = None
+_ingest_lock = threading.Lock()
+_header = None  # (stat stamp, header) of the snapshot last looked at
+
+def parse_catalog_csv(raw_bytes):
+    """Parse catalog CSV bytes into a DataFrame"""
+    df = pd.read_csv(io.BytesIO(raw_bytes), encoding='utf-8-sig')
+    df.columns = df.columns.str.strip()
+    return df
+
+def compact_catalog(df):
+    """Split a parsed catalog into a compact frame and its descriptions.
+
+    CATEGORY_COLUMNS become categoricals and pages/publication_year the
+    smallest int types that hold them. Returns (frame, descriptions), the
+    descriptions Series is aligned with the frame rows.
+    """
+    if 'description' in df:
+        descriptions = df['description']
+    else:
+        descriptions = pd.Series(None, index=df.index, dtype=object)
+    frame = df.drop(columns=['description'], errors='ignore')
+    for column in CATEGORY_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].astype('category')
+    if 'pages' in frame:
+        pages = pd.to_numeric(frame['pages'], errors='coerce').fillna(0).astype('int64')
+        frame['pages'] = pd.to_numeric(pages, downcast='integer')
+    if 'publication_year' in frame:
+        frame['publication_year'] = pd.to_numeric(frame['publication_year'], errors='coerce').round().astype('Int16')
+    return frame, descriptions
+
+def normalize_chunk(chunk, seen_ids):
+    """Strip column names and text values, drop rows without an id or title and ids already seen.
+
+    seen_ids is updated with the ids kept, so the first row of a duplicated id wins
+    across chunks.
+    """
+    chunk.columns = chunk.columns.str.strip()
+    for column in chunk.columns[chunk.dtypes == object]:
+        stripped = chunk[column].str.strip()
+        # .str turns non-string values (e.g. numbers in a mixed column) into NaN, keep those as they were
+        chunk[column] = stripped.where(stripped.notna(), chunk[column])
+    valid = chunk['id'].notna() & chunk['title'].fillna('').ne('')
+    chunk = chunk[valid]
+    # A missing id makes read_csv parse the whole column as float (1.0), so once those
+    # rows are gone turn integral ids back into int64 before they become keys
+    ids = pd.to_numeric(chunk['id'], errors='coerce')
+    if ids.notna().all() and (ids % 1 == 0).all():
+        chunk = chunk.assign(id=ids.astype('int64'))
+    chunk = chunk[~chunk['id'].duplicated()]
+    chunk = chunk[[book_id not in seen_ids for book_id in chunk['id'].tolist()]]
+    seen_ids.update(chunk['id'].tolist())
+    if 'pages' in chunk:
+        chunk = chunk.assign(pages=pd.to_numeric(chunk['pages'], errors='coerce').clip(lower=0))
+    return chunk
+
+def concat_chunks(chunks):
+    """Concatenate compact chunks into a new frame, merging the categories of CATEGORY_COLUMNS"""
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    aligned = [chunk.copy(deep=False) for chunk in chunks]
+    for column in CATEGORY_COLUMNS:
+        if column in aligned[0]:
+            categories = pd.Index([])
+            for chunk in aligned:
+                categories = categories.append(chunk[column].cat.categories).unique()
+            for chunk in aligned:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(aligned, ignore_index=True)
+
+class _DescriptionIndex:
+    """Header at the end of the descriptions file: where each book's text starts and ends.
+
+    Layout: the UTF-8 texts, then a pickled {'version', 'ids', 'starts', 'ends'}
+    with ids sorted, then the header offset as 8 little-endian bytes.
+    """
+
+    def __init__(self, f, stamp):
+        f.seek(-8, os.SEEK_END)
+        f.seek(int.from_bytes(f.read(8), 'little'))
+        header = pickle.load(f)
+        self.stamp = stamp
+        self.version = header['version']
+        self.ids = header['ids']
+        self.starts = header['starts']
+        self.ends = header['ends']
+
+    def span(self, book_id):
+        i = np.searchsorted(self.ids, book_id)
+        if i >= len(self.ids) or self.ids[i] != book_id:
+            return None
+        start, end = self.starts[i], self.ends[i]
+        return (start, end) if end > start else None
+
+def book_description(book_id):
+    """Description of one book, read from disk on demand; None when it has none"""
+    global _descriptions
+    try:
+        with open(CATALOG_DESCRIPTIONS, 'rb') as f:
+            # Reload the header whenever a refresh replaced the file
+            stat = os.fstat(f.fileno())
+            stamp = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            with _descriptions_lock:
+                if _descriptions is None or _descriptions.stamp != stamp:
+                    _descriptions = _DescriptionIndex(f, stamp)
+                index = _descriptions
+            span = index.span(book_id)
+            if span is None:
+                return None
+            f.seek(span[0])
+            return f.read(span[1] - span[0]).decode('utf-8')
+    except Exception as e:
+        print(f"Error reading book description: {e}")
+        return None
+
+def _tmp_path(path):
+    """New empty temp file next to path, unique per write so concurrent writers never share one"""
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    return tmp_path
+
+def _read_snapshot_header():
+    """Header pickled at the start of the snapshot, None without a snapshot in the current format"""
+    global _header
+    try:
+        with open(CATALOG_SNAPSHOT, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            stamp = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            cached = _header
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            header = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(header, dict) or header.get('format') != CATALOG_SNAPSHOT_FORMAT:
+        header = None
+    _header = (stamp, header)
+    return header
+
+def _meta_from_header(header):
+    return {key: header[key] for key in ('version', 'etag', 'last_modified', 'checked_at', 'rows')}
+
+def _read_meta():
+    """Metadata of the current snapshot, None when there is none.
+
+    The version comes from the snapshot itself. The meta file only saves
+    later checked_at updates, and is ignored when it was written for
+    another snapshot, e.g. read between a refresh replacing the snapshot
+    and rewriting the meta file.
+    """
+    header = _read_snapshot_header()
+    if header is None:
+        return None
+    try:
+        with open(CATALOG_META, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') == header['version']:
+            return meta
+    except (OSError, ValueError):
+        pass
+    return _meta_from_header(header)
+
+def _write_meta(meta):
+    tmp_path = _tmp_path(CATALOG_META)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, CATALOG_META)
+
+def _file_version(path):
+    """Version hash of a CSV file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def ingest_catalog(source, version, etag=None, last_modified=None, on_chunk=None, chunksize=CATALOG_CHUNK_SIZE,
+                   checked_at=None):
+    """Stream a catalog CSV (path or binary file) into the snapshot, chunksize rows at a time.
+
+    Every chunk is normalized, compacted and passed to on_chunk as soon as it is
+    read; its descriptions go straight to the descriptions file. Besides the
+    compact frame only one raw chunk is held in memory. checked_at defaults to
+    now, pass 0 to have the next catalog_version check upstream. Returns (metadata, frame).
+    """
+    os.makedirs(os.path.dirname(CATALOG_SNAPSHOT) or '.', exist_ok=True)
+    chunks = []
+    seen_ids = set()
+    ids, starts, ends = [], [], []
+    descriptions_tmp = _tmp_path(CATALOG_DESCRIPTIONS)
+    with open(descriptions_tmp, 'wb') as descriptions_file:
+        for raw in pd.read_csv(source, encoding='utf-8-sig', chunksize=chunksize):
+            chunk, descriptions = compact_catalog(normalize_chunk(raw, seen_ids))
+            if chunk.empty:
+                continue
+            encoded = [text.encode('utf-8') if isinstance(text, str) else b'' for text in descriptions]
+            lengths = np.array([len(text) for text in encoded], dtype=np.int64)
+            chunk_ends = descriptions_file.tell() + np.cumsum(lengths)
+            descriptions_file.write(b''.join(encoded))
+            ids.append(chunk['id'].to_numpy())
+            starts.append(chunk_ends - lengths)
+            ends.append(chunk_ends)
+            chunks.append(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+        header_offset = descriptions_file.tell()
+        all_ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+        order = np.argsort(all_ids, kind='stable')
+        header = {
+            'version': version,
+            'ids': all_ids[order],
+            'starts': np.concatenate(starts)[order] if starts else np.array([], dtype=np.int64),
+            'ends': np.concatenate(ends)[order] if ends else np.array([], dtype=np.int64)
+        }
+        pickle.dump(header, descriptions_file, protocol=pickle.HIGHEST_PROTOCOL)
+        descriptions_file.write(header_offset.to_bytes(8, 'little'))
+    os.replace(descriptions_tmp, CATALOG_DESCRIPTIONS)
+    df = concat_chunks(chunks)
+    del chunks
+    header = {
+        'format': CATALOG_SNAPSHOT_FORMAT,
+        'version': version,
+        'etag': etag,
+        'last_modified': last_modified,
+        'checked_at': time.time() if checked_at is None else checked_at,
+        'rows': len(df)
+    }
+    tmp_path = _tmp_path(CATALOG_SNAPSHOT)
+    with open(tmp_path, 'wb') as f:
+        # Header first, so the version is read without unpickling the frame
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, CATALOG_SNAPSHOT)
+    meta = _meta_from_header(header)
+    _write_meta(meta)
+    return meta, df
+
+def _write_snapshot(raw_bytes, etag=None, last_modified=None):
+    """Store raw CSV bytes as the snapshot"""
+    version = hashlib.sha256(raw_bytes).hexdigest()[:16]
+    meta, _ = ingest_catalog(io.BytesIO(raw_bytes), version, etag, last_modified)
+    return meta
+
+class CatalogIngest:
+    """Seeds the snapshot from the bundled CSV in a background thread.
+
+    Rows become visible chunk by chunk: frame() returns what has been read so
+    far and the title/author index grows with it, so the first pages can be
+    listed and searched before the whole file is in. Descriptions are only
+    readable once the ingest is done; from then on frame() is the complete
+    catalog, which load_catalog hands out instead of reading the snapshot back.
+    """
+
+    def __init__(self, path=CATALOG_LOCAL_CSV, fields=('title', 'author')):
+        self.path = path
+        self.index = SearchIndex(fields)
+        self.rows = 0
+        self.meta = None
+        self.error = None
+        self._chunks = []
+        self._frame = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._first_chunk = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='catalog-ingest', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the ingest finished; returns its metadata, or raises its error"""
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.meta
+
+    def _add_chunk(self, chunk):
+        # Rows are listed right away; search_books drops hits past the frame it was given
+        with self._lock:
+            self._chunks.append(chunk)
+            self.rows += len(chunk)
+        self._first_chunk.set()
+        self.index.add_rows(chunk)
+
+    def _run(self):
+        try:
+            # The bundled file has no validators, so let the next refresh check upstream
+            meta, frame = ingest_catalog(self.path, _file_version(self.path), on_chunk=self._add_chunk,
+                                         checked_at=0)
+            frame.attrs['version'] = meta['version']
+            with self._lock:
+                self._chunks = [frame]
+                self._frame = frame
+            self.meta = meta
+        except Exception as e:
+            print(f"Error ingesting catalog from {self.path}: {e}")
+            self.error = e
+        finally:
+            self._first_chunk.set()
+            self._done.set()
+
+    def frame(self):
+        """The rows ingested so far as one compact frame, waiting for the first chunk if needed"""
+        self._first_chunk.wait()
+        with self._lock:
+            if self._frame is None or len(self._frame) != self.rows:
+                self._frame = concat_chunks(self._chunks)
+                self._chunks = [self._frame] if self._chunks else []
+                self._frame.attrs['partial'] = True
+            return self._frame
+
+def current_ingest():
+    """The running or last finished CatalogIngest of this process, if any"""
+    return _ingest
+
+def start_ingest():
+    """Start seeding the snapshot in the background unless an ingest is running or already succeeded"""
+    global _ingest
+    with _ingest_lock:
+        if _ingest is None or (_ingest.done and _ingest.error is not None):
+            _ingest = CatalogIngest().start()
+        return _ingest
+
+def _ensure_snapshot(wait=True):
+    """Return snapshot metadata, seeding the snapshot from the bundled CSV if needed.
+
+    With wait=False returns None while the seeding ingest is still running.
+    """
+    meta = _read_meta()
+    if meta is not None:
+        return meta
+    ingest = start_ingest()
+    if not wait and not ingest.done:
+        return None
+    return ingest.wait()
+
+def catalog_version():
+    """Get the current catalog version hash and schedule an upstream check when due.
+
+    Returns None while the first snapshot is still being ingested (see current_ingest).
+    """
+    meta = _ensure_snapshot(wait=False)
+    if meta is None:
+        return None
+    if time.time() - meta.get('checked_at', 0) >= CATALOG_REFRESH_INTERVAL:
+        refresh_catalog_async()
+    return meta['version']
+
+def _read_snapshot():
+    """Header and frame of the snapshot read from one open file, None for an older format"""
+    with open(CATALOG_SNAPSHOT, 'rb') as f:
+        header = pickle.load(f)
+        if not isinstance(header, dict) or header.get('format') != CATALOG_SNAPSHOT_FORMAT:
+            return None
+        return header, pickle.load(f)
+
+def load_catalog():
+    """Load the compact catalog DataFrame (without descriptions) from the local snapshot"""
+    meta = _ensure_snapshot()
+    ingest = _ingest
+    if ingest is not None and ingest.meta is not None and ingest.meta['version'] == meta['version']:
+        # Ingested by this process, no need to read it back
+        return ingest.frame()
+    try:
+        # A refresh may have replaced the snapshot since meta was read; its frame
+        # is just as good, and the next catalog_version reports its version
+        snapshot = _read_snapshot()
+        if snapshot is not None:
+            return snapshot[1]
+    except Exception as e:
+        print(f"Error reading catalog snapshot: {e}")
+    # Snapshot is missing, unreadable or in an old format,
+    # rebuild it from the bundled CSV and let the next refresh check upstream
+    _, frame = ingest_catalog(CATALOG_LOCAL_CSV, _file_version(CATALOG_LOCAL_CSV), checked_at=0)
+    return frame
+
+def refresh_catalog():
+    """Check the upstream CSV with a conditional request and update the snapshot if it changed.
+
+    Returns True when a new version was stored. Network errors are logged and the
+    local snapshot keeps serving.
+    """
+    meta = _ensure_snapshot()
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        with requests.get(CATALOG_SOURCE_URL, headers=headers, timeout=10, stream=True) as response:
+            if response.status_code == 304:
+                meta['checked_at'] = time.time()
+                _write_meta(meta)
+                return False
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            # Download to a file and ingest it from there, so the whole CSV is never in memory
+            download_path = _tmp_path(CATALOG_SNAPSHOT + '.download')
+            digest = hashlib.sha256()
+            with open(download_path, 'wb') as f:
+                for block in response.iter_content(1 << 20):
+                    digest.update(block)
+                    f.write(block)
+        try:
+            version = digest.hexdigest()[:16]
+            if version == meta['version']:
+                meta.update({'etag': etag, 'last_modified': last_modified, 'checked_at': time.time()})
+                _write_meta(meta)
+                return False
+            ingest_catalog(download_path, version, etag, last_modified)
+            return True
+        finally:
+            os.remove(download_path)
+    except Exception as e:
+        print(f"Error refreshing catalog from {CATALOG_SOURCE_URL}: {e}")
+        meta['checked_at'] = time.time()
+        _write_meta(meta)
+        return False
+
+def refresh_catalog_async():
+    """Run refresh_catalog in a background thread unless one is already running"""
+    global _refresh_running
+    with _refresh_lock:
+        if _refresh_running:
+            return
+        _refresh_running = True
+
+    def run():
+        global _refresh_running
+        try:
+            refresh_catalog()
+        finally:
+            with _refresh_lock:
+                _refresh_running = False
+
+    threading.Thread(target=run, name='catalog-refresh', daemon=True).start()
@@ -1,13 +1,31 @@
 import streamlit as st
-from modules.mysql_data import (
-    add_creative_work, get_creative_works, 
-    add_creative_work_comment, get_creative_work_comments
+from functools import partial
+from modules.repository import (
+    add_creative_work, get_creative_works, get_creative_works_feed, get_creative_work,
+    add_creative_work_comment, get_creative_work_comments, fetch_concurrently, WORK_SNIPPET_LENGTH
 )
+from modules.works_search import search_works
+from modules.profiler import timed
 
+FEED_PAGE_SIZE = 10
+SEARCH_PAGE_SIZE = 10
+
+@timed()
 def show_creative_works(user):
     st.subheader("🎨 Քո Ստեղծագործությունները")
     
-    tab1, tab2, tab3 = st.tabs(["➕ Նոր Ստեղծագործություն", "📂 Իմ Ստեղծագործությունները", "🌍 Համայնքի Ստեղծագործությունները"])
+    # The own-works list and a missing community feed page don't depend on each other, load them in parallel
+    feed = st.session_state.get('community_feed')
+    calls = {'my_works': partial(get_creative_works, user_id=user['id'])}
+    if not feed or feed['user_id'] != user['id']:
+        calls['feed_page'] = partial(get_creative_works_feed, exclude_user_id=user['id'], limit=FEED_PAGE_SIZE)
+    fetched = fetch_concurrently(**calls)
+    if 'feed_page' in fetched:
+        works, cursor = fetched['feed_page']
+        feed = {'user_id': user['id'], 'works': works, 'cursor': cursor}
+        st.session_state.community_feed = feed
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["➕ Նոր Ստեղծագործություն", "📂 Իմ Ստեղծագործությունները", "🌍 Համայնքի Ստեղծագործությունները", "🔍 Որոնում"])
     
     with tab1:
         st.write("### ✍️ Ստեղծել Նոր Ստեղծագործություն")
@@ -58,7 +76,7 @@ def show_creative_works(user):
     with tab2:
         st.write("### 📂 Իմ Ստեղծագործությունները")
         
-        my_works = get_creative_works(user_id=user['id'])
+        my_works = fetched['my_works']
         
         if my_works:
             for idx, work in enumerate(my_works):
@@ -90,37 +108,118 @@ def show_creative_works(user):
     with tab3:
         st.write("### 🌍 Համայնքի Ստեղծագործություններ")
         
-        community_works = get_creative_works(public_only=True)
-        
-        if community_works:
-            for idx, work in enumerate(community_works):
-                # Don't show user's own works in community section
-                if work['user_id'] != user['id']:
-                    with st.expander(f"🎭 {work['title']} - 👤 {work['username']} ({work['content_type']})"):
-                        col1, col2 = st.columns([3, 1])
-                        
-                        with col1:
-                            st.write(f"**Հեղինակ:** {work['username']}")
-                            st.write(f"**Տեսակ:** {work['content_type']}")
-                            if work['genre']:
-                                st.write(f"**ժանր:** {work['genre']}")
-                            if work['description']:
-                                st.write(f"**Նկարագրություն:** {work['description']}")
-                            
-                            st.write("---")
-                            st.write("**📖 Բովանդակություն:**")
-                            st.write(work['content'])
-                        
-                        with col2:
-                            st.write(f"**Հրապարակված է:**")
-                            st.write(work['created_at'])
-                        
-                        # Show comments for this work
-                        st.write("---")
-                        show_creative_work_comments_section(work['id'], user, f"community_{work['id']}_{idx}")
+        # Listing rows are paged with a keyset cursor; full content is fetched only for the opened work
+        if feed['works']:
+            open_work_id = st.session_state.get('open_work_id')
+            for work in feed['works']:
+                is_open = work['id'] == open_work_id
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.write(f"🎭 **{work['title']}** - 👤 {work['username']} ({work['content_type']}) • 💬 {work['comment_count']}")
+                    if work['genre']:
+                        st.caption(f"ժանր: {work['genre']}")
+                    st.caption(work['snippet'] + ("…" if len(work['snippet']) >= WORK_SNIPPET_LENGTH else ""))
+                with col2:
+                    if st.button("🔼 Փակել" if is_open else "🔽 Բացել", key=f"toggle_work_{work['id']}"):
+                        st.session_state.open_work_id = None if is_open else work['id']
+                        st.rerun()
+                if is_open:
+                    show_community_work_details(work['id'], user)
+                st.markdown("---")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if feed['cursor'] is not None and st.button("⬇️ Բեռնել Ավելին", key="load_more_works"):
+                    works, cursor = get_creative_works_feed(exclude_user_id=user['id'], limit=FEED_PAGE_SIZE, cursor=feed['cursor'])
+                    feed['works'].extend(works)
+                    feed['cursor'] = cursor
+                    st.rerun()
+            with col2:
+                if st.button("🔄 Թարմացնել", key="refresh_works"):
+                    st.session_state.pop('community_feed', None)
+                    st.rerun()
         else:
             st.info("👥 Դեռ չկան համայնքի ստեղծագործություններ։ Դուք կարող եք լինել առաջինը։")
 
+    with tab4:
+        show_works_search(user)
+
+@timed()
+def show_works_search(user):
+    """Full-text search over creative works and their comments"""
+    st.write("### 🔍 Որոնել Ստեղծագործություններում")
+    
+    query = st.text_input("Որոնել վերնագրում, նկարագրությունում, բովանդակությունում և մեկնաբանություններում",
+                          key="works_search_query")
+    if not query.strip():
+        return
+    
+    if st.session_state.get('works_search_last') != query:
+        st.session_state.works_search_last = query
+        st.session_state.works_search_page = 0
+    page = st.session_state.get('works_search_page', 0)
+    
+    results, has_more = search_works(query, user['id'], limit=SEARCH_PAGE_SIZE, offset=page * SEARCH_PAGE_SIZE)
+    if not results:
+        st.info("🔍 Ոչինչ չի գտնվել")
+        return
+    
+    open_work_id = st.session_state.get('open_search_work_id')
+    for result in results:
+        is_open = result['work_id'] == open_work_id
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"🎭 **{result['title']}** - 👤 {result['username']} ({result['content_type']})")
+            st.caption(result['snippet'])
+        with col2:
+            if st.button("🔼 Փակել" if is_open else "🔽 Բացել", key=f"toggle_search_{result['work_id']}"):
+                st.session_state.open_search_work_id = None if is_open else result['work_id']
+                st.rerun()
+        if is_open:
+            show_community_work_details(result['work_id'], user, "search")
+        st.markdown("---")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if page > 0 and st.button("⬅️ Նախորդ", key="works_search_prev"):
+            st.session_state.works_search_page = page - 1
+            st.rerun()
+    with col2:
+        if has_more and st.button("Հաջորդ ➡️", key="works_search_next"):
+            st.session_state.works_search_page = page + 1
+            st.rerun()
+
+@timed()
+def show_community_work_details(work_id, user, context="community"):
+    """Show full content and comments of one opened community work"""
+    work = get_creative_work(work_id)
+    if not work:
+        st.error("❌ Ստեղծագործությունը չի գտնվել")
+        return
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.write(f"**Հեղինակ:** {work['username']}")
+        st.write(f"**Տեսակ:** {work['content_type']}")
+        if work['genre']:
+            st.write(f"**ժանր:** {work['genre']}")
+        if work['description']:
+            st.write(f"**Նկարագրություն:** {work['description']}")
+        
+        st.write("---")
+        st.write("**📖 Բովանդակություն:**")
+        st.write(work['content'])
+    
+    with col2:
+        st.write(f"**Հրապարակված է:**")
+        st.write(work['created_at'])
+    
+    # Show comments for this work
+    st.write("---")
+    show_creative_work_comments_section(work['id'], user, f"{context}_{work['id']}")
+
+@timed()
 def show_creative_work_comments_section(creative_work_id, user, unique_suffix=""):
     """Show comments section for a specific creative work"""
     st.write("#### 💬 Մեկնաբանություններ")
@@ -153,6 +252,8 @@ def show_creative_work_comments_section(creative_work_id, user, unique_suffix=""
         if submit_comment and new_comment.strip():
             success = add_creative_work_comment(creative_work_id, user['id'], new_comment.strip(), user['username'])
             if success:
+                # Comment counts in the community feed are stale now
+                st.session_state.pop('community_feed', None)
                 st.success("✅ Ձեր մեկնաբանությունը հաջողությամբ ավելացվել է!")
                 st.rerun()
             else:
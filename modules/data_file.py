@@ -1,37 +1,56 @@
-import json
 import os
+import threading
 from datetime import datetime
+from modules.append_log import AppendLog
+from modules.profiler import instrument
+from modules.works_search import index_work, index_work_comment
+from modules.reminders import days_to_mask, mask_to_days, format_reminder_time, is_due, notify_reminder_changed
+
+DATA_DIR = 'data'
+
+# Characters of content shown in the community feed before a work is opened
+WORK_SNIPPET_LENGTH = 200
+
+# Secondary indexes kept in memory for each table
+TABLE_INDEXES = {
+    'reading_sessions': ('user_id',),
+    'book_comments': ('book_id',),
+    'creative_works': ('user_id', 'is_public'),
+    'creative_work_comments': ('creative_work_id',),
+    'reading_reminders': ('user_id',),
+    'user_reading_stats': ()
+}
+
+_tables = {}
+_tables_lock = threading.Lock()
 
 def ensure_data_dir():
     """Ensure data directory exists"""
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(DATA_DIR, exist_ok=True)
 
-def load_data(filename, default=[]):
-    """Load data from JSON file"""
-    ensure_data_dir()
-    filepath = f'data/{filename}.json'
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except:
-        pass
-    return default
-
-def save_data(filename, data):
-    """Save data to JSON file"""
-    ensure_data_dir()
-    filepath = f'data/{filename}.json'
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def get_table(name):
+    """Get the append-log table for name, opening (and replaying) it on first use"""
+    table = _tables.get(name)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(name)
+            if table is None:
+                ensure_data_dir()
+                table = AppendLog(name, TABLE_INDEXES.get(name, ()), DATA_DIR)
+                _tables[name] = table
+    return table
 
 # Reading Sessions
 def add_reading_session(user_id, book_id, pages_read, session_duration, book_title):
-    """Add reading session"""
-    sessions = load_data('reading_sessions', [])
-    
+    """Add reading session.
+
+    The session and the rollup live in two logs, so they are two writes, and a
+    crash in between leaves the rollup one session behind. The rollup records
+    the newest session id it includes: get_user_stats rebuilds it when that is
+    not the user's newest session, and the update below skips a session a
+    rebuild already counted.
+    """
     session = {
-        'id': len(sessions) + 1,
         'user_id': user_id,
         'book_id': book_id,
         'book_title': book_title,
@@ -40,23 +59,90 @@ def add_reading_session(user_id, book_id, pages_read, session_duration, book_tit
         'created_at': str(datetime.now())
     }
     
-    sessions.append(session)
-    save_data('reading_sessions', sessions)
+    session_id = get_table('reading_sessions').insert(session)['id']
+    
+    def add_session(stats):
+        stats = stats or {'user_id': user_id, 'total_sessions': 0, 'total_pages': 0, 'total_minutes': 0}
+        if stats.get('last_session_id', 0) >= session_id:
+            return stats
+        return {
+            **stats,
+            'total_sessions': stats['total_sessions'] + 1,
+            'total_pages': stats['total_pages'] + pages_read,
+            'total_minutes': stats['total_minutes'] + session_duration,
+            'last_session_id': session_id
+        }
+    
+    # The rollup row uses the user id as its record id
+    get_table('user_reading_stats').update(user_id, add_session)
     return True
 
-def get_user_sessions(user_id):
-    """Get user's reading sessions"""
-    sessions = load_data('reading_sessions', [])
-    user_sessions = [s for s in sessions if s['user_id'] == user_id]
-    return user_sessions
+def get_user_sessions(user_id, limit=None):
+    """Get user's reading sessions, newest first"""
+    sessions = get_table('reading_sessions').find('user_id', user_id)[::-1]
+    return sessions[:limit] if limit is not None else sessions
+
+def get_user_sessions_page(user_id, limit=10, cursor=None, columns=None):
+    """Get one page of the user's reading history, newest first.
+
+    cursor is the (created_at, id) of the last row of the previous page; ids grow
+    with time here, so only the id part is used. Returns (sessions, next_cursor).
+    """
+    before_id = cursor[1] if cursor is not None else None
+    sessions = get_table('reading_sessions').find_page('user_id', user_id, limit + 1, before_id)
+    if columns is not None:
+        keep = set(columns) | {'id', 'created_at'}
+        sessions = [{k: v for k, v in s.items() if k in keep} for s in sessions]
+    if len(sessions) <= limit:
+        return sessions, None
+    sessions = sessions[:limit]
+    return sessions, (sessions[-1]['created_at'], sessions[-1]['id'])
+
+def get_user_stats(user_id):
+    """Get the user's reading statistics rollup, rebuilding it when it missed a session"""
+    stats = get_table('user_reading_stats').get(user_id) or {}
+    if stats.get('last_session_id') != get_table('reading_sessions').last_id('user_id', user_id):
+        rebuild_user_stats(user_id)
+        stats = get_table('user_reading_stats').get(user_id) or {}
+    total_pages = stats.get('total_pages', 0)
+    total_minutes = stats.get('total_minutes', 0)
+    return {
+        'user_id': user_id,
+        'total_sessions': stats.get('total_sessions', 0),
+        'total_pages': total_pages,
+        'total_minutes': total_minutes,
+        'avg_pages_per_hour': total_pages / (total_minutes / 60) if total_minutes > 0 else 0
+    }
+
+def rebuild_user_stats(user_id=None):
+    """Recompute the statistics rollup from reading sessions for one user or everyone"""
+    sessions_table = get_table('reading_sessions')
+    stats_table = get_table('user_reading_stats')
+    sessions = sessions_table.find('user_id', user_id) if user_id is not None else sessions_table.all()
+    
+    totals = {}
+    for session in sessions:
+        stats = totals.setdefault(session['user_id'], {
+            'user_id': session['user_id'], 'total_sessions': 0, 'total_pages': 0, 'total_minutes': 0,
+            'last_session_id': 0
+        })
+        stats['total_sessions'] += 1
+        stats['total_pages'] += session['pages_read']
+        stats['total_minutes'] += session['session_duration']
+        stats['last_session_id'] = max(stats['last_session_id'], session['id'])
+    
+    stale = [user_id] if user_id is not None else [stats['id'] for stats in stats_table.all()]
+    for stale_id in stale:
+        if stale_id not in totals:
+            stats_table.delete(stale_id)
+    for stats_user_id, stats in totals.items():
+        stats_table.put({'id': stats_user_id, **stats})
+    return len(totals)
 
 # Book Comments
 def add_book_comment(user_id, book_id, comment_text, rating, username):
     """Add book comment"""
-    comments = load_data('book_comments', [])
-    
     comment = {
-        'id': len(comments) + 1,
         'user_id': user_id,
         'username': username,
         'book_id': book_id,
@@ -65,23 +151,22 @@ def add_book_comment(user_id, book_id, comment_text, rating, username):
         'created_at': str(datetime.now())
     }
     
-    comments.append(comment)
-    save_data('book_comments', comments)
+    get_table('book_comments').insert(comment)
     return True
 
 def get_book_comments(book_id):
     """Get comments for a book"""
-    comments = load_data('book_comments', [])
-    book_comments = [c for c in comments if c['book_id'] == book_id]
-    return book_comments
+    return get_comments_for_books([book_id]).get(book_id, [])
+
+def get_comments_for_books(book_ids):
+    """Get comments for many books from the book_id index, returns {book_id: [comments]}"""
+    table = get_table('book_comments')
+    return {book_id: table.find('book_id', book_id) for book_id in dict.fromkeys(book_ids)}
 
 # Creative Works
 def add_creative_work(user_id, title, content_type, content, genre, description, is_public, username):
     """Add creative work"""
-    works = load_data('creative_works', [])
-    
     work = {
-        'id': len(works) + 1,
         'user_id': user_id,
         'username': username,
         'title': title,
@@ -93,27 +178,56 @@ def add_creative_work(user_id, title, content_type, content, genre, description,
         'created_at': str(datetime.now())
     }
     
-    works.append(work)
-    save_data('creative_works', works)
+    work = get_table('creative_works').insert(work)
+    index_work(work)
     return work['id']
 
 def get_creative_works(user_id=None, public_only=True):
     """Get creative works"""
-    works = load_data('creative_works', [])
+    table = get_table('creative_works')
     
     if user_id:
-        return [w for w in works if w['user_id'] == user_id]
+        return table.find('user_id', user_id)
     elif public_only:
-        return [w for w in works if w['is_public']]
+        return table.find('is_public', True)
     else:
-        return works
+        return table.all()
+
+def get_creative_works_feed(exclude_user_id=None, limit=10, cursor=None):
+    """Get one page of public creative works with listing columns only, newest first.
+
+    Returns (works, next_cursor), cursors are (created_at, id).
+    """
+    before_id = cursor[1] if cursor is not None else None
+    where = (lambda w: w['user_id'] != exclude_user_id) if exclude_user_id is not None else None
+    works = get_table('creative_works').find_page('is_public', True, limit + 1, before_id, where)
+    comments = get_table('creative_work_comments')
+    
+    feed = []
+    for work in works:
+        feed.append({
+            'id': work['id'],
+            'user_id': work['user_id'],
+            'username': work['username'],
+            'title': work['title'],
+            'content_type': work['content_type'],
+            'genre': work['genre'],
+            'created_at': work['created_at'],
+            'snippet': work['content'][:WORK_SNIPPET_LENGTH],
+            'comment_count': len(comments.find('creative_work_id', work['id']))
+        })
+    if len(feed) <= limit:
+        return feed, None
+    feed = feed[:limit]
+    return feed, (feed[-1]['created_at'], feed[-1]['id'])
+
+def get_creative_work(work_id):
+    """Get one creative work with its full content"""
+    return get_table('creative_works').get(work_id)
 
 def add_creative_work_comment(creative_work_id, user_id, comment_text, username):
     """Add comment to creative work"""
-    comments = load_data('creative_work_comments', [])
-    
     comment = {
-        'id': len(comments) + 1,
         'creative_work_id': creative_work_id,
         'user_id': user_id,
         'username': username,
@@ -121,45 +235,70 @@ def add_creative_work_comment(creative_work_id, user_id, comment_text, username)
         'created_at': str(datetime.now())
     }
     
-    comments.append(comment)
-    save_data('creative_work_comments', comments)
+    get_table('creative_work_comments').insert(comment)
+    index_work_comment(creative_work_id, comment_text)
     return True
 
 def get_creative_work_comments(creative_work_id):
     """Get comments for creative work"""
-    comments = load_data('creative_work_comments', [])
-    work_comments = [c for c in comments if c['creative_work_id'] == creative_work_id]
-    return work_comments
+    return get_table('creative_work_comments').find('creative_work_id', creative_work_id)
 
 # Reminders
+def _decode_reminder(reminder):
+    """Add days_of_week names for the UI; rows written before days_mask existed carry the list"""
+    reminder = dict(reminder)
+    if 'days_mask' not in reminder:
+        reminder['days_mask'] = days_to_mask(reminder.get('days_of_week', []))
+    reminder['days_of_week'] = mask_to_days(reminder['days_mask'])
+    return reminder
+
 def add_reminder(user_id, reminder_time, days_of_week, is_active=True):
     """Add reading reminder"""
-    reminders = load_data('reading_reminders', [])
+    try:
+        reminder_time = format_reminder_time(reminder_time)
+    except ValueError as e:
+        print(f"Error adding reminder: {e}")
+        return False
+    
+    table = get_table('reading_reminders')
     
     # Remove existing reminders for this user
-    reminders = [r for r in reminders if r['user_id'] != user_id]
+    for existing in table.find('user_id', user_id):
+        table.delete(existing['id'])
     
     reminder = {
-        'id': len(reminders) + 1,
         'user_id': user_id,
         'reminder_time': reminder_time,
-        'days_of_week': days_of_week,
+        'days_mask': days_to_mask(days_of_week),
         'is_active': is_active,
         'created_at': str(datetime.now())
     }
     
-    reminders.append(reminder)
-    save_data('reading_reminders', reminders)
+    reminder = table.insert(reminder)
+    notify_reminder_changed(_decode_reminder(reminder))
     return True
 
 def get_user_reminder(user_id):
     """Get user's reminder"""
-    reminders = load_data('reading_reminders', [])
-    user_reminders = [r for r in reminders if r['user_id'] == user_id]
-    return user_reminders[0] if user_reminders else None
+    user_reminders = get_table('reading_reminders').find('user_id', user_id)
+    return _decode_reminder(user_reminders[0]) if user_reminders else None
+
+def get_active_reminders():
+    """Get every active reminder, for the scheduler"""
+    return [_decode_reminder(r) for r in get_table('reading_reminders').all() if r['is_active']]
 
 def check_reminder_time(user_id):
-    """Check if it's reminder time (simplified version)"""
-    # This is a simplified version - in a real app you'd check current time
-    # For now, we'll just return False to avoid constant notifications
-    return False
+    """Check if the user's reminder window (lead minutes before reading time) is open now"""
+    return is_due(get_user_reminder(user_id))
+
+def flush_writes():
+    """Same interface as mysql_data.flush_writes; writes here are never deferred"""
+    return True
+
+# Concurrent fetching
+def fetch_concurrently(**calls):
+    """Same interface as mysql_data.fetch_concurrently; reads here are in memory, so they just run in turn"""
+    return {name: call() for name, call in calls.items()}
+
+# Time every public data function when PROFILE=1
+instrument(globals(), query=True, exclude=('fetch_concurrently', 'ensure_data_dir', 'get_table'))
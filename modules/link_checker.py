@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules.utils import check_link_availability
+
+LINK_CHECK_WORKERS = int(os.getenv('LINK_CHECK_WORKERS', 16))
+LINK_CHECK_TTL = int(os.getenv('LINK_CHECK_TTL', 6 * 60 * 60))
+LINK_CHECK_RETRY_BASE = int(os.getenv('LINK_CHECK_RETRY_BASE', 60))
+LINK_CHECK_RETRY_MAX = int(os.getenv('LINK_CHECK_RETRY_MAX', 6 * 60 * 60))
+LINK_CACHE_FILE = os.getenv('LINK_CACHE_FILE', os.path.join('data', 'link_status.json'))
+
+class LinkProber:
+    """Process-wide link checker with a thread pool and a TTL cache shared through a JSON file.
+
+    Healthy links are re-checked after `ttl` seconds. Broken links are retried with
+    exponential backoff (retry_base, 2*retry_base, ... up to retry_max), so a dead
+    host is not hammered by every new session.
+    """
+
+    def __init__(self, cache_file=LINK_CACHE_FILE, workers=LINK_CHECK_WORKERS, ttl=LINK_CHECK_TTL,
+                 retry_base=LINK_CHECK_RETRY_BASE, retry_max=LINK_CHECK_RETRY_MAX):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._entries = {}  # url -> {'ok': bool, 'checked_at': float, 'failures': int}
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='link-probe')
+        self._file_mtime = None
+        self._last_stat = 0.0
+        self._load()
+
+    def _expires_at(self, entry):
+        if entry['ok']:
+            return entry['checked_at'] + self.ttl
+        backoff = self.retry_base * 2 ** max(entry['failures'] - 1, 0)
+        return entry['checked_at'] + min(backoff, self.retry_max)
+
+    def status(self, url):
+        """Return cached availability of url, or None while it is still being probed.
+
+        Expired entries keep returning their last known value while a refresh runs
+        in the background, so the caller never waits on the network.
+        """
+        self._maybe_reload()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or time.time() >= self._expires_at(entry):
+                self._submit(url)
+            return entry['ok'] if entry else None
+
+    def prefetch(self, urls):
+        """Queue probes for every url that has no fresh cache entry"""
+        self._maybe_reload()
+        now = time.time()
+        with self._lock:
+            for url in urls:
+                entry = self._entries.get(url)
+                if entry is None or now >= self._expires_at(entry):
+                    self._submit(url)
+
+    def _submit(self, url):
+        # Caller holds self._lock
+        if url in self._pending:
+            return
+        self._pending.add(url)
+        self._executor.submit(self._probe, url)
+
+    def _probe(self, url):
+        ok = check_link_availability(url)
+        with self._lock:
+            previous = self._entries.get(url)
+            failures = 0 if ok else (previous['failures'] + 1 if previous else 1)
+            self._entries[url] = {'ok': ok, 'checked_at': time.time(), 'failures': failures}
+            self._pending.discard(url)
+            batch_done = not self._pending
+        if batch_done:
+            self._save()
+
+    def _load(self):
+        """Merge entries from the shared cache file, keeping the newest result per url"""
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for url, entry in stored.items():
+                current = self._entries.get(url)
+                if current is None or entry['checked_at'] > current['checked_at']:
+                    self._entries[url] = entry
+            self._file_mtime = mtime
+
+    def _maybe_reload(self):
+        # Pick up results written by other processes, at most once per second
+        now = time.time()
+        if now - self._last_stat < 1:
+            return
+        self._last_stat = now
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+        except OSError:
+            return
+        if mtime != self._file_mtime:
+            self._load()
+
+    def _save(self):
+        self._load()
+        with self._lock:
+            snapshot = dict(self._entries)
+        try:
+            cache_dir = os.path.dirname(self.cache_file) or '.'
+            os.makedirs(cache_dir, exist_ok=True)
+            # A temp file per save: probe threads of one process may finish batches at the same time
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.cache_file) + '.', suffix='.tmp',
+                                            dir=cache_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.cache_file)
+            self._file_mtime = os.path.getmtime(self.cache_file)
+        except OSError as e:
+            print(f"Error saving link status cache: {e}")
+
+_prober = None
+_prober_lock = threading.Lock()
+
+def get_link_prober():
+    """Get the process-wide LinkProber instance"""
+    global _prober
+    if _prober is None:
+        with _prober_lock:
+            if _prober is None:
+                _prober = LinkProber()
+    return _prober
@@ -0,0 +1,231 @@
+import os
+import threading
+from mysql.connector import Error
+from modules.mysql_db import db
+
+# Apply pending migrations on the first request of each process; set to 0 to
+# run them only through `python manage.py migrate`
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '1') == '1'
+
+MIGRATION_LOCK_TIMEOUT = int(os.getenv('MIGRATION_LOCK_TIMEOUT', 60))
+
+# MySQL commits DDL implicitly, so a migration that fails halfway has already
+# changed the schema without being recorded. Index and column steps check
+# information_schema first, so rerunning such a migration picks up where it stopped.
+def _schema_has(cursor, table_kind, name_column, table, name):
+    cursor.execute(
+        f"SELECT 1 FROM information_schema.{table_kind} "
+        f"WHERE table_schema = DATABASE() AND table_name = %s AND {name_column} = %s LIMIT 1",
+        (table, name)
+    )
+    return cursor.fetchone() is not None
+
+def create_index(name, table, columns):
+    """Migration step: CREATE INDEX unless the index exists"""
+    def step(cursor):
+        if not _schema_has(cursor, 'statistics', 'index_name', table, name):
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+    return step
+
+def add_column(table, column, definition):
+    """Migration step: ALTER TABLE ... ADD COLUMN unless the column exists"""
+    def step(cursor):
+        if not _schema_has(cursor, 'columns', 'column_name', table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+def drop_column(table, column):
+    """Migration step: ALTER TABLE ... DROP COLUMN if the column exists"""
+    def step(cursor):
+        if _schema_has(cursor, 'columns', 'column_name', table, column):
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+    return step
+
+# (version, name, steps); a step is an SQL string or a function of the cursor.
+# Never edit an applied migration, add a new one.
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            reading_speed INT DEFAULT 2,
+            daily_reading_time INT DEFAULT 30,
+            preferred_genres TEXT,
+            preferred_language VARCHAR(50) DEFAULT 'Հայերեն',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reading_sessions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            book_id VARCHAR(255) NOT NULL,
+            book_title VARCHAR(500) NOT NULL,
+            pages_read INT NOT NULL,
+            session_duration INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS book_comments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            username VARCHAR(255) NOT NULL,
+            book_id VARCHAR(255) NOT NULL,
+            comment_text TEXT NOT NULL,
+            rating INT CHECK (rating >= 1 AND rating <= 5),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS creative_works (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            username VARCHAR(255) NOT NULL,
+            title VARCHAR(500) NOT NULL,
+            content_type VARCHAR(100) NOT NULL,
+            content TEXT NOT NULL,
+            genre VARCHAR(255),
+            description TEXT,
+            is_public BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS creative_work_comments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            creative_work_id INT NOT NULL,
+            user_id INT NOT NULL,
+            username VARCHAR(255) NOT NULL,
+            comment_text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (creative_work_id) REFERENCES creative_works(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reading_reminders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT UNIQUE NOT NULL,
+            reminder_time TIME NOT NULL,
+            days_of_week VARCHAR(100) NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    ]),
+    (2, "hot path indexes", [
+        create_index("idx_sessions_user_created", "reading_sessions", "user_id, created_at"),
+        create_index("idx_book_comments_book_created", "book_comments", "book_id, created_at"),
+        create_index("idx_works_public_created", "creative_works", "is_public, created_at"),
+        create_index("idx_work_comments_work_created", "creative_work_comments", "creative_work_id, created_at")
+    ]),
+    (3, "per-user reading statistics rollup", [
+        """
+        CREATE TABLE IF NOT EXISTS user_reading_stats (
+            user_id INT PRIMARY KEY,
+            total_sessions INT NOT NULL DEFAULT 0,
+            total_pages BIGINT NOT NULL DEFAULT 0,
+            total_minutes BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        INSERT INTO user_reading_stats (user_id, total_sessions, total_pages, total_minutes)
+        SELECT user_id, COUNT(*), SUM(pages_read), SUM(session_duration)
+        FROM reading_sessions
+        GROUP BY user_id
+        """
+    ]),
+    (4, "reminder days as a bitmask", [
+        add_column("reading_reminders", "days_mask", "TINYINT UNSIGNED NOT NULL DEFAULT 127 AFTER reminder_time"),
+        drop_column("reading_reminders", "days_of_week"),
+        create_index("idx_reminders_active", "reading_reminders", "is_active")
+    ])
+]
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def latest_version():
+    """Version of the newest known migration"""
+    return MIGRATIONS[-1][0]
+
+def get_schema_version(cursor):
+    """Highest applied migration version, 0 for a fresh database"""
+    cursor.execute("SHOW TABLES LIKE 'schema_migrations'")
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+def migrate():
+    """Apply pending migrations in order, returns the list of applied versions"""
+    applied = []
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        # Serialize concurrent runners (several app workers starting at once)
+        cursor.execute("SELECT GET_LOCK('reading_app_migrations', %s)", (MIGRATION_LOCK_TIMEOUT,))
+        if cursor.fetchone()[0] != 1:
+            cursor.close()
+            raise Error(msg=f"Could not get the migration lock within {MIGRATION_LOCK_TIMEOUT}s, "
+                            "another process is still migrating")
+        try:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            current = get_schema_version(cursor)
+            for version, name, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                print(f"Applying migration {version}: {name}")
+                for statement in statements:
+                    if callable(statement):
+                        statement(cursor)
+                    else:
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+                applied.append(version)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('reading_app_migrations')")
+            cursor.fetchone()
+            cursor.close()
+    return applied
+
+def ensure_schema():
+    """Check the schema version once per process and migrate if AUTO_MIGRATE is on"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                current = get_schema_version(cursor)
+                cursor.close()
+            if current < latest_version():
+                if AUTO_MIGRATE:
+                    migrate()
+                else:
+                    print(f"Database schema is at version {current}, run `python manage.py migrate`")
+            _schema_ready = True
+        except Error as e:
+            print(f"Error checking database schema: {e}")
@@ -1,89 +1,263 @@
-from modules.mysql_db import db
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from modules.mysql_db import db, DB_POOL_SIZE
+from modules.cache import TTLCache
+from modules.profiler import instrument
+from modules.queries import query, query_one, execute, in_placeholders
+from modules.works_search import index_work, index_work_comment
+from modules.write_behind import WRITE_BEHIND, WRITE_BEHIND_SYNC, WriteBehindQueue, flush_all
+from modules.reminders import (
+    days_to_mask, mask_to_days, parse_reminder_time, format_reminder_time,
+    is_due, notify_reminder_changed
+)
 from datetime import datetime
 
-# Reading Sessions
-def add_reading_session(user_id, book_id, pages_read, session_duration, book_title):
-    """Add reading session to MySQL"""
+# Characters of content shown in the community feed before a work is opened
+WORK_SNIPPET_LENGTH = 200
+
+# Explicit column lists per use case; rows come back as Row namedtuples (see modules.queries)
+SESSION_COLUMNS = ('id', 'user_id', 'book_id', 'book_title', 'pages_read', 'session_duration', 'created_at')
+# Columns the history view needs
+SESSION_HISTORY_COLUMNS = ('id', 'book_title', 'pages_read', 'session_duration', 'created_at')
+BOOK_COMMENT_COLUMNS = ('id', 'user_id', 'username', 'book_id', 'comment_text', 'rating', 'created_at')
+WORK_COLUMNS = ('id', 'user_id', 'username', 'title', 'content_type', 'content', 'genre', 'description',
+                'is_public', 'created_at')
+WORK_COMMENT_COLUMNS = ('id', 'creative_work_id', 'user_id', 'username', 'comment_text', 'created_at')
+REMINDER_COLUMNS = 'r.user_id, r.reminder_time, r.days_mask, r.is_active, u.email'
+
+# Book comments keyed by str(book_id); add_book_comment drops the entry of the book it touched
+_book_comments_cache = TTLCache(maxsize=4096, ttl=int(os.getenv('COMMENTS_CACHE_TTL', 60)))
+
+def _write(queue, write_batch, row, error):
+    """Insert one row now, or hand it to the write-behind queue when WRITE_BEHIND=1"""
+    if queue is not None:
+        return queue.submit(row, wait=WRITE_BEHIND_SYNC)
     try:
-        conn = db.get_connection()
+        write_batch([row])
+        return True
+    except Exception as e:
+        print(f"Error {error}: {e}")
+        return False
+
+def flush_writes():
+    """Commit queued write-behind rows now, e.g. before reading them back"""
+    return flush_all()
+
+# Reading Sessions
+def _write_sessions(rows):
+    """Insert (user_id, book_id, book_title, pages_read, session_duration) rows and update the
+    statistics rollup of their users in one transaction"""
+    totals = {}
+    for user_id, _, _, pages_read, session_duration in rows:
+        user_totals = totals.setdefault(user_id, [0, 0, 0])
+        user_totals[0] += 1
+        user_totals[1] += pages_read
+        user_totals[2] += session_duration
+    with db.connection() as conn:
         cursor = conn.cursor()
         
-        query = """
+        sql = """
         INSERT INTO reading_sessions (user_id, book_id, book_title, pages_read, session_duration)
         VALUES (%s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (user_id, book_id, book_title, pages_read, session_duration))
+        cursor.executemany(sql, rows)
+        
+        sql = """
+        INSERT INTO user_reading_stats (user_id, total_sessions, total_pages, total_minutes)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+        total_sessions = total_sessions + VALUES(total_sessions),
+        total_pages = total_pages + VALUES(total_pages),
+        total_minutes = total_minutes + VALUES(total_minutes)
+        """
+        cursor.executemany(sql, [(user_id, *user_totals) for user_id, user_totals in totals.items()])
         conn.commit()
         cursor.close()
-        return True
-    except Exception as e:
-        print(f"Error adding reading session: {e}")
-        return False
 
-def get_user_sessions(user_id):
-    """Get user's reading sessions from MySQL"""
+_session_writes = WriteBehindQueue('reading_sessions', _write_sessions) if WRITE_BEHIND else None
+
+def add_reading_session(user_id, book_id, pages_read, session_duration, book_title):
+    """Add reading session to MySQL and update the user's statistics rollup in the same transaction"""
+    return _write(_session_writes, _write_sessions,
+                  (user_id, book_id, book_title, pages_read, session_duration), "adding reading session")
+
+SESSIONS_QUERY = f"""
+SELECT {', '.join(SESSION_COLUMNS)} FROM reading_sessions WHERE user_id = %s ORDER BY created_at DESC
+"""
+SESSIONS_LIMIT_QUERY = SESSIONS_QUERY + " LIMIT %s"
+
+def get_user_sessions(user_id, limit=None):
+    """Get user's reading sessions from MySQL, newest first"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = "SELECT * FROM reading_sessions WHERE user_id = %s ORDER BY created_at DESC"
-        cursor.execute(query, (user_id,))
-        sessions = cursor.fetchall()
-        cursor.close()
-        return sessions
+        with db.connection() as conn:
+            if limit is not None:
+                return query(conn, SESSIONS_LIMIT_QUERY, (user_id, limit))
+            return query(conn, SESSIONS_QUERY, (user_id,))
     except Exception as e:
         print(f"Error getting user sessions: {e}")
         return []
 
-# Book Comments
-def add_book_comment(user_id, book_id, comment_text, rating, username):
-    """Add book comment to MySQL"""
+def get_user_sessions_page(user_id, limit=10, cursor=None, columns=SESSION_HISTORY_COLUMNS):
+    """Get one page of the user's reading history, newest first.
+
+    cursor is the (created_at, id) of the last row of the previous page. Returns
+    (sessions, next_cursor), next_cursor is None after the last page.
+    """
+    columns = [c for c in SESSION_COLUMNS if c in columns or c in ('id', 'created_at')]
+    try:
+        with db.connection() as conn:
+            # Served by the (user_id, created_at) index, which also carries the primary key
+            sql = f"SELECT {', '.join(columns)} FROM reading_sessions WHERE user_id = %s"
+            params = [user_id]
+            if cursor is not None:
+                sql += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+                params += [cursor[0], cursor[0], cursor[1]]
+            sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+            params.append(limit + 1)
+            sessions = query(conn, sql, params)
+    except Exception as e:
+        print(f"Error getting user sessions page: {e}")
+        return [], None
+    
+    if len(sessions) <= limit:
+        return sessions, None
+    sessions = sessions[:limit]
+    return sessions, (sessions[-1]['created_at'], sessions[-1]['id'])
+
+def _stats_row(user_id, total_sessions=0, total_pages=0, total_minutes=0):
+    total_pages = int(total_pages)
+    total_minutes = int(total_minutes)
+    return {
+        'user_id': user_id,
+        'total_sessions': int(total_sessions),
+        'total_pages': total_pages,
+        'total_minutes': total_minutes,
+        'avg_pages_per_hour': total_pages / (total_minutes / 60) if total_minutes > 0 else 0
+    }
+
+STATS_QUERY = "SELECT total_sessions, total_pages, total_minutes FROM user_reading_stats WHERE user_id = %s"
+
+def get_user_stats(user_id):
+    """Get the user's reading statistics rollup with one primary key lookup"""
+    try:
+        with db.connection() as conn:
+            row = query_one(conn, STATS_QUERY, (user_id,))
+            return _stats_row(user_id, **row) if row else _stats_row(user_id)
+    except Exception as e:
+        print(f"Error getting user stats: {e}")
+        return _stats_row(user_id)
+
+def rebuild_user_stats(user_id=None):
+    """Recompute the statistics rollup from reading_sessions for one user or everyone"""
     try:
-        conn = db.get_connection()
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            
+            where = "WHERE user_id = %s" if user_id is not None else ""
+            params = (user_id,) if user_id is not None else ()
+            cursor.execute(f"DELETE FROM user_reading_stats {where}", params)
+            cursor.execute(f"""
+            INSERT INTO user_reading_stats (user_id, total_sessions, total_pages, total_minutes)
+            SELECT user_id, COUNT(*), SUM(pages_read), SUM(session_duration)
+            FROM reading_sessions {where}
+            GROUP BY user_id
+            """, params)
+            rebuilt = cursor.rowcount
+            conn.commit()
+            cursor.close()
+            return rebuilt
+    except Exception as e:
+        print(f"Error rebuilding user stats: {e}")
+        return 0
+
+# Book Comments
+def _write_book_comments(rows):
+    """Insert (user_id, book_id, comment_text, rating, username) rows, then drop the cached comments of their books"""
+    with db.connection() as conn:
         cursor = conn.cursor()
         
-        query = """
+        sql = """
         INSERT INTO book_comments (user_id, book_id, comment_text, rating, username)
         VALUES (%s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (user_id, book_id, comment_text, rating, username))
+        cursor.executemany(sql, rows)
         conn.commit()
         cursor.close()
-        return True
-    except Exception as e:
-        print(f"Error adding book comment: {e}")
-        return False
+    for row in rows:
+        _book_comments_cache.invalidate(str(row[1]))
+
+_book_comment_writes = WriteBehindQueue('book_comments', _write_book_comments) if WRITE_BEHIND else None
+
+def add_book_comment(user_id, book_id, comment_text, rating, username):
+    """Add book comment to MySQL"""
+    return _write(_book_comment_writes, _write_book_comments,
+                  (user_id, book_id, comment_text, rating, username), "adding book comment")
 
 def get_book_comments(book_id):
     """Get comments for a book from MySQL"""
+    return get_comments_for_books([book_id]).get(book_id, [])
+
+def get_comments_for_books(book_ids):
+    """Get comments for many books with a single query, returns {book_id: [comments]}"""
+    result = {}
+    missing = []
+    for book_id in dict.fromkeys(book_ids):
+        comments = _book_comments_cache.get(str(book_id))
+        if comments is None:
+            missing.append(book_id)
+        else:
+            result[book_id] = comments
+    
+    if not missing:
+        return result
+    
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = "SELECT * FROM book_comments WHERE book_id = %s ORDER BY created_at DESC"
-        cursor.execute(query, (book_id,))
-        comments = cursor.fetchall()
-        cursor.close()
-        return comments
+        with db.connection() as conn:
+            # book_id is a VARCHAR column, compare as strings so the index can be used
+            placeholders, params = in_placeholders(str(book_id) for book_id in missing)
+            sql = f"""
+            SELECT {', '.join(BOOK_COMMENT_COLUMNS)} FROM book_comments
+            WHERE book_id IN ({placeholders}) ORDER BY created_at DESC
+            """
+            rows = query(conn, sql, params)
     except Exception as e:
         print(f"Error getting book comments: {e}")
-        return []
+        for book_id in missing:
+            result[book_id] = []
+        return result
+    
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(str(row['book_id']), []).append(row)
+    for book_id in missing:
+        comments = grouped.get(str(book_id), [])
+        _book_comments_cache.set(str(book_id), comments)
+        result[book_id] = comments
+    return result
 
 # Creative Works
+ADD_WORK_QUERY = """
+INSERT INTO creative_works (user_id, title, content_type, content, genre, description, is_public, username)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+WORKS_BY_USER_QUERY = f"SELECT {', '.join(WORK_COLUMNS)} FROM creative_works WHERE user_id = %s ORDER BY created_at DESC"
+PUBLIC_WORKS_QUERY = f"SELECT {', '.join(WORK_COLUMNS)} FROM creative_works WHERE is_public = TRUE ORDER BY created_at DESC"
+ALL_WORKS_QUERY = f"SELECT {', '.join(WORK_COLUMNS)} FROM creative_works ORDER BY created_at DESC"
+WORK_QUERY = f"SELECT {', '.join(WORK_COLUMNS)} FROM creative_works WHERE id = %s"
+
 def add_creative_work(user_id, title, content_type, content, genre, description, is_public, username):
     """Add creative work to MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        INSERT INTO creative_works (user_id, title, content_type, content, genre, description, is_public, username)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(query, (user_id, title, content_type, content, genre, description, is_public, username))
-        work_id = cursor.lastrowid
-        conn.commit()
-        cursor.close()
+        with db.connection() as conn:
+            _, work_id = execute(conn, ADD_WORK_QUERY,
+                                 (user_id, title, content_type, content, genre, description, is_public, username))
+            conn.commit()
+        index_work({
+            'id': work_id, 'user_id': user_id, 'username': username, 'title': title,
+            'content_type': content_type, 'content': content, 'description': description,
+            'is_public': is_public, 'created_at': datetime.now()
+        })
         return work_id
     except Exception as e:
         print(f"Error adding creative work: {e}")
@@ -92,82 +266,136 @@ def add_creative_work(user_id, title, content_type, content, genre, description,
 def get_creative_works(user_id=None, public_only=True):
     """Get creative works from MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        if user_id:
-            query = "SELECT * FROM creative_works WHERE user_id = %s ORDER BY created_at DESC"
-            cursor.execute(query, (user_id,))
-        elif public_only:
-            query = "SELECT * FROM creative_works WHERE is_public = TRUE ORDER BY created_at DESC"
-            cursor.execute(query)
-        else:
-            query = "SELECT * FROM creative_works ORDER BY created_at DESC"
-            cursor.execute(query)
-        
-        works = cursor.fetchall()
-        cursor.close()
-        return works
+        with db.connection() as conn:
+            if user_id:
+                return query(conn, WORKS_BY_USER_QUERY, (user_id,))
+            if public_only:
+                return query(conn, PUBLIC_WORKS_QUERY)
+            return query(conn, ALL_WORKS_QUERY)
     except Exception as e:
         print(f"Error getting creative works: {e}")
         return []
 
-def add_creative_work_comment(creative_work_id, user_id, comment_text, username):
-    """Add comment to creative work in MySQL"""
+def get_creative_works_feed(exclude_user_id=None, limit=10, cursor=None):
+    """Get one page of public creative works for the community feed, newest first.
+
+    Rows carry only listing columns: title, author, type, genre, a content snippet
+    and the comment count. cursor/next_cursor are (created_at, id) like
+    get_user_sessions_page. Returns (works, next_cursor).
+    """
+    try:
+        with db.connection() as conn:
+            sql = """
+            SELECT w.id, w.user_id, w.username, w.title, w.content_type, w.genre, w.created_at,
+                   LEFT(w.content, %s) AS snippet,
+                   (SELECT COUNT(*) FROM creative_work_comments c
+                    WHERE c.creative_work_id = w.id) AS comment_count
+            FROM creative_works w
+            WHERE w.is_public = TRUE
+            """
+            params = [WORK_SNIPPET_LENGTH]
+            if exclude_user_id is not None:
+                sql += " AND w.user_id <> %s"
+                params.append(exclude_user_id)
+            if cursor is not None:
+                sql += " AND (w.created_at < %s OR (w.created_at = %s AND w.id < %s))"
+                params += [cursor[0], cursor[0], cursor[1]]
+            sql += " ORDER BY w.created_at DESC, w.id DESC LIMIT %s"
+            params.append(limit + 1)
+            works = query(conn, sql, params)
+    except Exception as e:
+        print(f"Error getting creative works feed: {e}")
+        return [], None
+    
+    if len(works) <= limit:
+        return works, None
+    works = works[:limit]
+    return works, (works[-1]['created_at'], works[-1]['id'])
+
+def get_creative_work(work_id):
+    """Get one creative work with its full content"""
     try:
-        conn = db.get_connection()
+        with db.connection() as conn:
+            return query_one(conn, WORK_QUERY, (work_id,))
+    except Exception as e:
+        print(f"Error getting creative work: {e}")
+        return None
+
+def _write_work_comments(rows):
+    """Insert (creative_work_id, user_id, comment_text, username) rows, then add them to the search index"""
+    with db.connection() as conn:
         cursor = conn.cursor()
         
-        query = """
+        sql = """
         INSERT INTO creative_work_comments (creative_work_id, user_id, comment_text, username)
         VALUES (%s, %s, %s, %s)
         """
-        cursor.execute(query, (creative_work_id, user_id, comment_text, username))
+        cursor.executemany(sql, rows)
         conn.commit()
         cursor.close()
-        return True
-    except Exception as e:
-        print(f"Error adding creative work comment: {e}")
-        return False
+    for creative_work_id, _, comment_text, _ in rows:
+        index_work_comment(creative_work_id, comment_text)
+
+_work_comment_writes = WriteBehindQueue('creative_work_comments', _write_work_comments) if WRITE_BEHIND else None
+
+def add_creative_work_comment(creative_work_id, user_id, comment_text, username):
+    """Add comment to creative work in MySQL"""
+    return _write(_work_comment_writes, _write_work_comments,
+                  (creative_work_id, user_id, comment_text, username), "adding creative work comment")
+
+WORK_COMMENTS_QUERY = f"""
+SELECT {', '.join(WORK_COMMENT_COLUMNS)} FROM creative_work_comments
+WHERE creative_work_id = %s
+ORDER BY created_at ASC
+"""
 
 def get_creative_work_comments(creative_work_id):
     """Get comments for creative work from MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-        SELECT * FROM creative_work_comments 
-        WHERE creative_work_id = %s 
-        ORDER BY created_at ASC
-        """
-        cursor.execute(query, (creative_work_id,))
-        comments = cursor.fetchall()
-        cursor.close()
-        return comments
+        with db.connection() as conn:
+            return query(conn, WORK_COMMENTS_QUERY, (creative_work_id,))
     except Exception as e:
         print(f"Error getting creative work comments: {e}")
         return []
 
 # Reminders
+def _decode_reminder(row):
+    """Return the row as a dict with reminder_time as 'HH:MM' and days_of_week as day names, like the UI expects"""
+    row = row._asdict()
+    row['reminder_time'] = format_reminder_time(row['reminder_time'])
+    row['days_of_week'] = mask_to_days(row['days_mask'])
+    row['is_active'] = bool(row['is_active'])
+    return row
+
+# Use INSERT ... ON DUPLICATE KEY UPDATE since user_id is unique
+ADD_REMINDER_QUERY = """
+INSERT INTO reading_reminders (user_id, reminder_time, days_mask, is_active)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+reminder_time = VALUES(reminder_time),
+days_mask = VALUES(days_mask),
+is_active = VALUES(is_active)
+"""
+REMINDER_QUERY = f"""
+SELECT {REMINDER_COLUMNS}
+FROM reading_reminders r JOIN users u ON u.id = r.user_id
+WHERE r.user_id = %s
+"""
+ACTIVE_REMINDERS_QUERY = f"""
+SELECT {REMINDER_COLUMNS}
+FROM reading_reminders r JOIN users u ON u.id = r.user_id
+WHERE r.is_active = TRUE
+"""
+
 def add_reminder(user_id, reminder_time, days_of_week, is_active=True):
     """Add reading reminder to MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Use INSERT ... ON DUPLICATE KEY UPDATE since user_id is unique
-        query = """
-        INSERT INTO reading_reminders (user_id, reminder_time, days_of_week, is_active)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE 
-        reminder_time = VALUES(reminder_time),
-        days_of_week = VALUES(days_of_week),
-        is_active = VALUES(is_active)
-        """
-        cursor.execute(query, (user_id, reminder_time, days_of_week, is_active))
-        conn.commit()
-        cursor.close()
+        reading_time = parse_reminder_time(reminder_time)
+        days_mask = days_to_mask(days_of_week)
+        with db.connection() as conn:
+            execute(conn, ADD_REMINDER_QUERY, (user_id, reading_time, days_mask, is_active))
+            conn.commit()
+        notify_reminder_changed(get_user_reminder(user_id))
         return True
     except Exception as e:
         print(f"Error adding reminder: {e}")
@@ -176,19 +404,40 @@ def add_reminder(user_id, reminder_time, days_of_week, is_active=True):
 def get_user_reminder(user_id):
     """Get user's reminder from MySQL"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = "SELECT * FROM reading_reminders WHERE user_id = %s"
-        cursor.execute(query, (user_id,))
-        reminder = cursor.fetchone()
-        cursor.close()
-        return reminder
+        with db.connection() as conn:
+            reminder = query_one(conn, REMINDER_QUERY, (user_id,))
+            return _decode_reminder(reminder) if reminder else None
     except Exception as e:
         print(f"Error getting user reminder: {e}")
         return None
 
+def get_active_reminders():
+    """Get every active reminder with the user's e-mail, for the scheduler"""
+    with db.connection() as conn:
+        reminders = query(conn, ACTIVE_REMINDERS_QUERY)
+    return [_decode_reminder(reminder) for reminder in reminders]
+
 def check_reminder_time(user_id):
-    """Check if it's reminder time"""
-    # Simplified version - you can implement proper time checking
-    return False
+    """Check if the user's reminder window (lead minutes before reading time) is open now"""
+    return is_due(get_user_reminder(user_id))
+
+# Concurrent fetching
+# Shared by all sessions of the process and sized like the connection pool
+_fetch_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix='db-fetch')
+
+def fetch_concurrently(**calls):
+    """Run independent queries in parallel, each in a worker thread on its own pooled connection.
+
+    Every keyword is a zero-argument callable (e.g. functools.partial) and the
+    result is {keyword: return value}. Workers and connections are shared with
+    every other session, so under load a call still waits for a free worker or
+    connection; the total time is about the slowest query only when they are free.
+    """
+    if len(calls) <= 1:
+        return {name: call() for name, call in calls.items()}
+    # Each call runs in a copy of this thread's context, so the profiler counts it for this rerun
+    futures = {name: _fetch_executor.submit(contextvars.copy_context().run, call) for name, call in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+# Time every public data function when PROFILE=1; fetch_concurrently only dispatches
+instrument(globals(), query=True, exclude=('fetch_concurrently',))
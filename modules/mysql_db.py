@@ -1,135 +1,126 @@
 import mysql.connector
 from mysql.connector import Error
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 import streamlit as st
 from datetime import datetime
 
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Idle connections older than this are pinged on checkout, fresher ones are trusted
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', 30))
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the pool timeout"""
+
 class MySQLDatabase:
-    def __init__(self):
-        self.connection = None
-        self.connect()
+    """Bounded pool of MySQL connections shared by all Streamlit sessions.
+
+    Use `with db.connection() as conn:` to check a connection out; it is
+    rolled back (ending any open read snapshot) and returned to the pool on exit.
+    """
+
+    def __init__(self, pool_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, ping_after=DB_POOL_PING_AFTER):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()  # (connection, returned_at)
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'in_use': 0,
+            'created': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'waited': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
     
     def connect(self):
-        """Establish database connection"""
+        """Open a new database connection"""
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'root'),
+            password=os.getenv('DB_PASSWORD', ''),
+            database=os.getenv('DB_NAME', 'reading_tracker'),
+            port=os.getenv('DB_PORT', 3306)
+        )
+        self._count('created')
+        return connection
+    
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+    
+    def _discard(self, connection):
+        self._count('discarded')
         try:
-            self.connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                user=os.getenv('DB_USER', 'root'),
-                password=os.getenv('DB_PASSWORD', ''),
-                database=os.getenv('DB_NAME', 'reading_tracker'),
-                port=os.getenv('DB_PORT', 3306)
-            )
-            print("Connected to MySQL database")
-        except Error as e:
-            print(f"Error connecting to MySQL: {e}")
-            # Fallback to SQLite for development
-            self.connection = None
+            connection.close()
+        except Exception:
+            pass
     
-    def get_connection(self):
-        """Get database connection, reconnect if needed"""
-        if self.connection is None or not self.connection.is_connected():
-            self.connect()
-        return self.connection
+    def acquire(self):
+        """Check a healthy connection out of the pool, waiting up to the pool timeout"""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise PoolTimeoutError(f"No database connection free after {self.timeout}s")
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            self._stats['wait_time_total'] += waited
+            if waited > 0.001:
+                self._stats['waited'] += 1
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+        
+        try:
+            while True:
+                try:
+                    connection, returned_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return self.connect()
+                if time.monotonic() - returned_at < self.ping_after or connection.is_connected():
+                    return connection
+                self._discard(connection)
+        except Exception:
+            self._count('in_use', -1)
+            self._slots.release()
+            raise
+    
+    def release(self, connection):
+        """Return a connection to the pool, dropping it if it can't be reset"""
+        try:
+            connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._count('in_use', -1)
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a pooled connection"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+    
+    def pool_stats(self):
+        """Snapshot of pool usage and wait metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['size'] = self.pool_size
+        stats['idle'] = self._idle.qsize()
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
 
 # Create global instance
 db = MySQLDatabase()
-
-def init_database():
-    """Initialize database tables"""
-    try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(255) UNIQUE NOT NULL,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password VARCHAR(255) NOT NULL,
-            reading_speed INT DEFAULT 2,
-            daily_reading_time INT DEFAULT 30,
-            preferred_genres TEXT,
-            preferred_language VARCHAR(50) DEFAULT 'Հայերեն',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Reading sessions table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS reading_sessions (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            book_id VARCHAR(255) NOT NULL,
-            book_title VARCHAR(500) NOT NULL,
-            pages_read INT NOT NULL,
-            session_duration INT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        # Book comments table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS book_comments (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            username VARCHAR(255) NOT NULL,
-            book_id VARCHAR(255) NOT NULL,
-            comment_text TEXT NOT NULL,
-            rating INT CHECK (rating >= 1 AND rating <= 5),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        # Creative works table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS creative_works (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            username VARCHAR(255) NOT NULL,
-            title VARCHAR(500) NOT NULL,
-            content_type VARCHAR(100) NOT NULL,
-            content TEXT NOT NULL,
-            genre VARCHAR(255),
-            description TEXT,
-            is_public BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        # Creative work comments table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS creative_work_comments (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            creative_work_id INT NOT NULL,
-            user_id INT NOT NULL,
-            username VARCHAR(255) NOT NULL,
-            comment_text TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (creative_work_id) REFERENCES creative_works(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        # Reading reminders table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS reading_reminders (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT UNIQUE NOT NULL,
-            reminder_time TIME NOT NULL,
-            days_of_week VARCHAR(100) NOT NULL,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-        """)
-        
-        conn.commit()
-        cursor.close()
-        print("Database tables initialized successfully")
-        
-    except Error as e:
-        print(f"Error initializing database: {e}")
@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+from modules.write_behind import write_behind_stats
+
+# Off by default: timed() and instrument() then leave functions untouched
+PROFILE_ENABLED = os.getenv('PROFILE', '0') == '1'
+PROFILE_LOG = os.getenv('PROFILE_LOG', os.path.join('data', 'profile.log'))
+PROFILE_LOG_MAX_BYTES = int(os.getenv('PROFILE_LOG_MAX_BYTES', 1024 * 1024))
+# Prometheus text-format file for node_exporter's textfile collector; empty disables it
+PROFILE_METRICS_FILE = os.getenv('PROFILE_METRICS_FILE', os.path.join('data', 'reading_app.prom'))
+PROFILE_METRICS_INTERVAL = float(os.getenv('PROFILE_METRICS_INTERVAL', 5))
+
+# Context variables are copied into fetch_concurrently's worker threads, so calls made
+# there are still attributed to the rerun that started them
+_current_rerun = contextvars.ContextVar('current_rerun', default=None)
+_in_query = contextvars.ContextVar('in_query', default=False)
+
+# (metric, stats key, type, help) for every write-behind queue
+WRITE_BEHIND_METRICS = (
+    ('reading_app_write_behind_depth', 'depth', 'gauge', 'Rows waiting in a write-behind queue.'),
+    ('reading_app_write_behind_written_total', 'written', 'counter', 'Rows committed by a write-behind queue.'),
+    ('reading_app_write_behind_batches_total', 'batches', 'counter', 'Batches flushed by a write-behind queue.'),
+    ('reading_app_write_behind_failed_batches_total', 'failed_batches', 'counter', 'Batches that failed to commit.'),
+    ('reading_app_write_behind_flush_seconds_total', 'flush_seconds_total', 'counter', 'Time spent flushing batches.'),
+    ('reading_app_write_behind_flush_seconds_max', 'flush_seconds_max', 'gauge', 'Slowest batch flush.')
+)
+
+_totals = {}  # name -> [calls, seconds] for the whole process
+_rerun_totals = {'reruns': 0, 'seconds': 0.0, 'db_calls': 0}
+_totals_lock = threading.Lock()
+_metrics_written = 0.0
+
+class Rerun:
+    """Timings collected during one Streamlit script run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.timings = {}  # name -> [calls, seconds]
+        self.db_calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, query):
+        with self._lock:
+            entry = self.timings.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            if query:
+                self.db_calls += 1
+
+def _record(name, seconds, query):
+    rerun = _current_rerun.get()
+    if rerun is not None:
+        rerun.record(name, seconds, query)
+    with _totals_lock:
+        entry = _totals.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+def timed(name=None, query=False):
+    """Decorator timing every call of a function; query=True also counts it as a DB call.
+
+    Nested data-layer calls (e.g. get_book_comments -> get_comments_for_books)
+    count as one DB call. When profiling is disabled the function is returned as is.
+    """
+    def decorator(func):
+        if not PROFILE_ENABLED:
+            return func
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer_query = query and not _in_query.get()
+            token = _in_query.set(True) if outer_query else None
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(label, time.perf_counter() - started, outer_query)
+                if token is not None:
+                    _in_query.reset(token)
+        return wrapper
+    return decorator
+
+def instrument(namespace, query=False, exclude=()):
+    """Wrap every public function defined in a module with timed(); call at the bottom of the module"""
+    if not PROFILE_ENABLED:
+        return
+    module = namespace['__name__']
+    for attr, value in list(namespace.items()):
+        if (callable(value) and getattr(value, '__module__', None) == module
+                and not attr.startswith('_') and not isinstance(value, type) and attr not in exclude):
+            namespace[attr] = timed(query=query)(value)
+
+def _write_log(rerun):
+    entry = {
+        'at': datetime.now().isoformat(timespec='seconds'),
+        'total_ms': round(rerun.elapsed * 1000, 2),
+        'db_calls': rerun.db_calls,
+        'timings': {name: [calls, round(seconds * 1000, 2)] for name, (calls, seconds) in rerun.timings.items()}
+    }
+    os.makedirs(os.path.dirname(PROFILE_LOG) or '.', exist_ok=True)
+    # Rolling log: one previous file is kept as .1
+    if os.path.exists(PROFILE_LOG) and os.path.getsize(PROFILE_LOG) >= PROFILE_LOG_MAX_BYTES:
+        os.replace(PROFILE_LOG, PROFILE_LOG + '.1')
+    with open(PROFILE_LOG, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def _write_metrics():
+    global _metrics_written
+    with _totals_lock:
+        if time.monotonic() - _metrics_written < PROFILE_METRICS_INTERVAL:
+            return
+        _metrics_written = time.monotonic()
+        totals = {name: list(entry) for name, entry in _totals.items()}
+        reruns = dict(_rerun_totals)
+    lines = [
+        '# HELP reading_app_calls_total Calls of instrumented functions.',
+        '# TYPE reading_app_calls_total counter'
+    ]
+    lines += [f'reading_app_calls_total{{name="{name}"}} {calls}' for name, (calls, _) in sorted(totals.items())]
+    lines += [
+        '# HELP reading_app_call_seconds_total Time spent in instrumented functions.',
+        '# TYPE reading_app_call_seconds_total counter'
+    ]
+    lines += [f'reading_app_call_seconds_total{{name="{name}"}} {seconds:.6f}' for name, (_, seconds) in sorted(totals.items())]
+    lines += [
+        '# HELP reading_app_reruns_total Streamlit script runs.',
+        '# TYPE reading_app_reruns_total counter',
+        f"reading_app_reruns_total {reruns['reruns']}",
+        '# HELP reading_app_rerun_seconds_total Time spent in script runs.',
+        '# TYPE reading_app_rerun_seconds_total counter',
+        f"reading_app_rerun_seconds_total {reruns['seconds']:.6f}",
+        '# HELP reading_app_db_calls_total Data-layer calls made by script runs.',
+        '# TYPE reading_app_db_calls_total counter',
+        f"reading_app_db_calls_total {reruns['db_calls']}"
+    ]
+    queues = write_behind_stats()
+    if queues:
+        for metric, key, kind, help_text in WRITE_BEHIND_METRICS:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{queue="{name}"}} {stats[key]}' for name, stats in sorted(queues.items())]
+    os.makedirs(os.path.dirname(PROFILE_METRICS_FILE) or '.', exist_ok=True)
+    tmp_path = f"{PROFILE_METRICS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, PROFILE_METRICS_FILE)
+
+def show_profiler_panel(rerun):
+    """Debug sidebar listing the slowest calls of this run"""
+    with st.sidebar.expander("⏱️ Պրոֆիլավորում", expanded=False):
+        st.write(f"**Ընդհանուր:** {rerun.elapsed * 1000:.1f} մվ • **DB կանչեր:** {rerun.db_calls}")
+        rows = sorted(rerun.timings.items(), key=lambda item: item[1][1], reverse=True)
+        st.dataframe(
+            [{'name': name, 'calls': calls, 'ms': round(seconds * 1000, 2)} for name, (calls, seconds) in rows],
+            hide_index=True,
+            use_container_width=True
+        )
+
+@contextmanager
+def profile_rerun():
+    """Wrap one script run: collect its timings, then log them and show the sidebar panel"""
+    if not PROFILE_ENABLED:
+        yield None
+        return
+    rerun = Rerun()
+    token = _current_rerun.set(rerun)
+    try:
+        yield rerun
+    finally:
+        _current_rerun.reset(token)
+        rerun.elapsed = time.perf_counter() - rerun.started
+        with _totals_lock:
+            _rerun_totals['reruns'] += 1
+            _rerun_totals['seconds'] += rerun.elapsed
+            _rerun_totals['db_calls'] += rerun.db_calls
+        try:
+            if PROFILE_LOG:
+                _write_log(rerun)
+            if PROFILE_METRICS_FILE:
+                _write_metrics()
+        except OSError as e:
+            print(f"Error writing profile data: {e}")
+    # Not reached when st.rerun()/st.stop() ended the run early
+    show_profiler_panel(rerun)
@@ -0,0 +1,92 @@
+import os
+from collections import OrderedDict, namedtuple
+
+# Prepared statements kept open per pooled connection
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))
+
+_row_types = {}
+
+def row_type(columns):
+    """Namedtuple class for a column tuple; rows also allow row['column'] and row.get('column')"""
+    cls = _row_types.get(columns)
+    if cls is None:
+        index = {name: i for i, name in enumerate(columns)}
+        get_item = tuple.__getitem__
+
+        def __getitem__(self, key):
+            return get_item(self, index[key] if isinstance(key, str) else key)
+
+        def get(self, key, default=None):
+            i = index.get(key)
+            return default if i is None else get_item(self, i)
+
+        def keys(self):
+            return self._fields
+
+        cls = type('Row', (namedtuple('Row', columns),), {
+            '__slots__': (),
+            '__getitem__': __getitem__,
+            'get': get,
+            'keys': keys
+        })
+        _row_types[columns] = cls
+    return cls
+
+def _statement(conn, sql):
+    """Prepared cursor for sql on this connection, and the exact string object it was prepared with.
+
+    mysql-connector re-prepares unless the same str object is passed again,
+    so callers must execute with the returned sql.
+    """
+    statements = getattr(conn, '_prepared_statements', None)
+    if statements is None:
+        statements = conn._prepared_statements = OrderedDict()  # sql -> (sql, cursor)
+    entry = statements.get(sql)
+    if entry is None:
+        entry = (sql, conn.cursor(prepared=True))
+        statements[sql] = entry
+        if len(statements) > DB_STATEMENT_CACHE_SIZE:
+            _, (_, evicted) = statements.popitem(last=False)
+            evicted.close()
+    else:
+        statements.move_to_end(sql)
+    return entry
+
+def _run(conn, sql, params):
+    sql, cursor = _statement(conn, sql)
+    try:
+        cursor.execute(sql, tuple(params))
+    except Exception:
+        # Leave no half-used statement behind for the next checkout
+        conn._prepared_statements.pop(sql, None)
+        cursor.close()
+        raise
+    return cursor
+
+def query(conn, sql, params=()):
+    """Run a prepared SELECT and return its rows as Row namedtuples"""
+    cursor = _run(conn, sql, params)
+    rows = cursor.fetchall()
+    make = row_type(tuple(cursor.column_names))._make
+    return [make(row) for row in rows]
+
+def query_one(conn, sql, params=()):
+    rows = query(conn, sql, params)
+    return rows[0] if rows else None
+
+def execute(conn, sql, params=()):
+    """Run a prepared INSERT/UPDATE/DELETE, returns (rowcount, lastrowid); the caller commits"""
+    cursor = _run(conn, sql, params)
+    return cursor.rowcount, cursor.lastrowid
+
+def in_placeholders(values):
+    """'%s, %s, ...' for an IN list, padded to a power of two by repeating the last value.
+
+    Padding keeps the number of distinct prepared statements small. Returns (placeholders, params).
+    """
+    values = list(values)
+    size = 1
+    while size < len(values):
+        size *= 2
+    values += values[-1:] * (size - len(values))
+    return ", ".join(["%s"] * size), values
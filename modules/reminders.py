@@ -0,0 +1,254 @@
+import heapq
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, time as dt_time
+from email.message import EmailMessage
+
+# Monday first, matching datetime.weekday(); bit i of days_mask is DAY_NAMES[i]
+DAY_NAMES = ["Երկուշաբթի", "Երեքշաբթի", "Չորեքշաբթի", "Հինգշաբթի", "Ուրբաթ", "Շաբաթ", "Կիրակի"]
+ALL_DAYS_MASK = (1 << len(DAY_NAMES)) - 1
+
+REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 5))
+# 'off' leaves delivery to a single `manage.py run-reminders` process; 'app' runs the
+# scheduler inside the Streamlit process, only for a deployment with one app process,
+# since every process that runs one sends every reminder
+REMINDER_SCHEDULER = os.getenv('REMINDER_SCHEDULER', 'off')
+REMINDER_SINK = os.getenv('REMINDER_SINK', 'file')
+REMINDER_OUTBOX = os.getenv('REMINDER_OUTBOX', os.path.join('data', 'reminder_outbox.jsonl'))
+# Full reload interval, picks up reminders changed by other processes
+REMINDER_RESYNC_SECONDS = int(os.getenv('REMINDER_RESYNC_SECONDS', 300))
+
+def days_to_mask(days):
+    """Encode a list of day names as a 7-bit mask"""
+    mask = 0
+    for day in days:
+        mask |= 1 << DAY_NAMES.index(day)
+    return mask
+
+def mask_to_days(mask):
+    """Decode a 7-bit mask to the list of day names"""
+    return [day for i, day in enumerate(DAY_NAMES) if mask & (1 << i)]
+
+def parse_reminder_time(value):
+    """Accept 'HH:MM', a time, or the timedelta MySQL returns for TIME columns"""
+    if isinstance(value, dt_time):
+        return value.replace(second=0, microsecond=0)
+    if isinstance(value, timedelta):
+        minutes = int(value.total_seconds()) // 60
+        return dt_time(minutes // 60 % 24, minutes % 60)
+    return datetime.strptime(str(value).strip()[:5], "%H:%M").time()
+
+def format_reminder_time(value):
+    return parse_reminder_time(value).strftime("%H:%M")
+
+def next_fire_time(reminder_time, days_mask, after, lead_minutes=REMINDER_LEAD_MINUTES):
+    """First moment strictly after `after` when a reminder should go out (lead minutes before reading time)"""
+    reading_time = parse_reminder_time(reminder_time)
+    lead = timedelta(minutes=lead_minutes)
+    # Start a day back: with the lead the fire time can fall on the previous day
+    for offset in range(-1, 9):
+        day = after.date() + timedelta(days=offset)
+        if not days_mask & (1 << day.weekday()):
+            continue
+        fire_at = datetime.combine(day, reading_time) - lead
+        if fire_at > after:
+            return fire_at
+    return None
+
+def is_due(reminder, now=None, lead_minutes=REMINDER_LEAD_MINUTES):
+    """True between the fire time and the reading time of an active reminder"""
+    if not reminder or not reminder['is_active']:
+        return False
+    now = now or datetime.now()
+    fire_at = next_fire_time(reminder['reminder_time'], reminder['days_mask'],
+                             now - timedelta(minutes=lead_minutes), lead_minutes)
+    return fire_at is not None and fire_at <= now
+
+def reminder_message(reminder):
+    return (f"📖 Ընթերցման ժամանակն է! {REMINDER_LEAD_MINUTES} րոպեից՝ "
+            f"{format_reminder_time(reminder['reminder_time'])}, սկսվում է ձեր ընթերցումը։")
+
+# Sinks
+class FileSink:
+    """Append reminders to a JSONL outbox file"""
+
+    def __init__(self, path=REMINDER_OUTBOX):
+        self.path = path
+
+    def send(self, reminder, fire_at):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        entry = {
+            'user_id': reminder['user_id'],
+            'email': reminder.get('email'),
+            'fire_at': fire_at.isoformat(),
+            'message': reminder_message(reminder)
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+class QueueSink:
+    """Keep reminders in an in-process queue, e.g. for tests or another consumer thread"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def send(self, reminder, fire_at):
+        self.queue.put((reminder['user_id'], fire_at, reminder_message(reminder)))
+
+class SMTPSink:
+    """Send reminders by e-mail, by default to a local SMTP stand-in (python -m aiosmtpd -n)"""
+
+    def __init__(self, host=None, port=None, sender=None):
+        self.host = host or os.getenv('SMTP_HOST', 'localhost')
+        self.port = int(port or os.getenv('SMTP_PORT', 1025))
+        self.sender = sender or os.getenv('SMTP_SENDER', 'reminders@reading-app.local')
+
+    def send(self, reminder, fire_at):
+        if not reminder.get('email'):
+            print(f"No e-mail address for reminder of user {reminder['user_id']}")
+            return
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = reminder['email']
+        message['Subject'] = "📖 Ընթերցման Հիշեցում"
+        message.set_content(reminder_message(reminder))
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+SINKS = {
+    'file': FileSink,
+    'queue': QueueSink,
+    'smtp': SMTPSink
+}
+
+def make_sink(name=REMINDER_SINK):
+    return SINKS[name]()
+
+class ReminderScheduler:
+    """Background thread that delivers reminders from a min-heap of next fire times.
+
+    The heap holds (fire_at, user_id, version) entries. upsert/remove bump the
+    user's version instead of searching the heap, and stale entries are
+    skipped when popped, so every change and every due reminder costs O(log n).
+    """
+
+    def __init__(self, load_reminders, sink, lead_minutes=REMINDER_LEAD_MINUTES,
+                 resync_seconds=REMINDER_RESYNC_SECONDS):
+        self.load_reminders = load_reminders
+        self.sink = sink
+        self.lead_minutes = lead_minutes
+        self.resync_seconds = resync_seconds
+        self._heap = []
+        self._reminders = {}  # user_id -> (reminder, version)
+        self._version = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._last_sync = 0.0
+        self.delivered = 0
+
+    def start(self):
+        try:
+            self.resync()
+        except Exception as e:
+            # Start anyway, the thread retries after resync_seconds
+            print(f"Error loading reminders: {e}")
+            self._last_sync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def resync(self):
+        """Reload every active reminder from the store"""
+        reminders = self.load_reminders()
+        with self._cond:
+            self._heap = []
+            self._reminders = {}
+            for reminder in reminders:
+                self._schedule(reminder, datetime.now())
+            heapq.heapify(self._heap)
+            self._last_sync = time.monotonic()
+            self._cond.notify()
+
+    def _schedule(self, reminder, after):
+        # Caller holds self._cond
+        self._version += 1
+        self._reminders[reminder['user_id']] = (reminder, self._version)
+        if not reminder['is_active']:
+            return
+        fire_at = next_fire_time(reminder['reminder_time'], reminder['days_mask'], after, self.lead_minutes)
+        if fire_at is not None:
+            heapq.heappush(self._heap, (fire_at, reminder['user_id'], self._version))
+
+    def upsert(self, reminder):
+        """Schedule a new or changed reminder"""
+        with self._cond:
+            self._schedule(reminder, datetime.now())
+            self._cond.notify()
+
+    def remove(self, user_id):
+        with self._cond:
+            self._version += 1
+            self._reminders.pop(user_id, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if time.monotonic() - self._last_sync >= self.resync_seconds:
+                        break
+                    if self._heap and self._heap[0][0] <= datetime.now():
+                        break
+                    timeout = self.resync_seconds
+                    if self._heap:
+                        timeout = min(timeout, (self._heap[0][0] - datetime.now()).total_seconds())
+                    self._cond.wait(max(timeout, 0.05))
+                if self._stopped:
+                    return
+                due = None
+                if self._heap and self._heap[0][0] <= datetime.now():
+                    fire_at, user_id, version = heapq.heappop(self._heap)
+                    current = self._reminders.get(user_id)
+                    if current and current[1] == version:
+                        due = (current[0], fire_at)
+                        self._schedule(current[0], fire_at)
+                needs_sync = time.monotonic() - self._last_sync >= self.resync_seconds
+            if due:
+                try:
+                    self.sink.send(*due)
+                    self.delivered += 1
+                except Exception as e:
+                    print(f"Error delivering reminder: {e}")
+            if needs_sync:
+                try:
+                    self.resync()
+                except Exception as e:
+                    print(f"Error reloading reminders: {e}")
+                    with self._cond:
+                        self._last_sync = time.monotonic()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def start_reminder_scheduler(load_reminders, sink=None):
+    """Start the process-wide scheduler once; later calls return the running instance"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            scheduler = ReminderScheduler(load_reminders, sink or make_sink())
+            scheduler.start()
+            _scheduler = scheduler
+    return _scheduler
+
+def notify_reminder_changed(reminder):
+    """Called by add_reminder so a running scheduler reloads just that row"""
+    if _scheduler is not None:
+        _scheduler.upsert(reminder)
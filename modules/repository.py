@@ -0,0 +1,61 @@
+"""Single entry point for sessions, comments, creative works and reminders.
+
+The UI imports data functions from here; DATA_BACKEND picks the module that
+implements them:
+    mysql   modules.mysql_data, the shared MySQL server (default)
+    sqlite  modules.sqlite_data, an embedded SQLite file in WAL mode for single-node setups
+    file    modules.data_file, JSONL append logs
+Every backend module provides the same functions with the same return shapes.
+"""
+import importlib
+import os
+
+BACKENDS = {
+    'mysql': 'modules.mysql_data',
+    'sqlite': 'modules.sqlite_data',
+    'file': 'modules.data_file'
+}
+
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'mysql')
+
+def load_backend(name=DATA_BACKEND):
+    """Import the data module for a backend name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DATA_BACKEND '{name}', expected one of: {', '.join(BACKENDS)}")
+    return importlib.import_module(BACKENDS[name])
+
+backend = load_backend()
+
+WORK_SNIPPET_LENGTH = backend.WORK_SNIPPET_LENGTH
+
+# Reading Sessions
+add_reading_session = backend.add_reading_session
+get_user_sessions = backend.get_user_sessions
+get_user_sessions_page = backend.get_user_sessions_page
+get_user_stats = backend.get_user_stats
+rebuild_user_stats = backend.rebuild_user_stats
+
+# Book Comments
+add_book_comment = backend.add_book_comment
+get_book_comments = backend.get_book_comments
+get_comments_for_books = backend.get_comments_for_books
+
+# Creative Works
+add_creative_work = backend.add_creative_work
+get_creative_works = backend.get_creative_works
+get_creative_works_feed = backend.get_creative_works_feed
+get_creative_work = backend.get_creative_work
+add_creative_work_comment = backend.add_creative_work_comment
+get_creative_work_comments = backend.get_creative_work_comments
+
+# Reminders
+add_reminder = backend.add_reminder
+get_user_reminder = backend.get_user_reminder
+get_active_reminders = backend.get_active_reminders
+check_reminder_time = backend.check_reminder_time
+
+# Write-behind (a no-op where writes are never deferred)
+flush_writes = backend.flush_writes
+
+# Concurrent fetching
+fetch_concurrently = backend.fetch_concurrently
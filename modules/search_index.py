@@ -0,0 +1,132 @@
+import unicodedata
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+# Phonetic Latin -> Armenian mapping, digraphs are matched before single letters
+LATIN_TO_ARMENIAN = {
+    'sh': 'շ', 'ch': 'չ', 'zh': 'ժ', 'kh': 'խ', 'gh': 'ղ', 'ts': 'ց', 'dz': 'ձ',
+    'th': 'թ', 'ph': 'փ', 'ou': 'ու', 'ev': 'եւ', 'yo': 'յո',
+    'a': 'ա', 'b': 'բ', 'g': 'գ', 'd': 'դ', 'e': 'ե', 'z': 'զ', 't': 'տ',
+    'i': 'ի', 'l': 'լ', 'x': 'խ', 'k': 'կ', 'h': 'հ', 'j': 'ջ', 'm': 'մ',
+    'y': 'յ', 'n': 'ն', 'o': 'ո', 'p': 'պ', 'r': 'ր', 's': 'ս', 'v': 'վ',
+    'w': 'վ', 'f': 'ֆ', 'q': 'ք', 'c': 'ց', 'u': 'ու'
+}
+
+def normalize_text(text):
+    """NFKC-normalize and case-fold text so Armenian, Cyrillic and Latin compare case-insensitively"""
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    # Russian titles are written with and without the diaeresis
+    return text.replace('ё', 'е')
+
+def transliterate_latin(text):
+    """Transliterate a (normalized) Latin query to Armenian letters"""
+    result = []
+    i = 0
+    while i < len(text):
+        pair = text[i:i + 2]
+        if pair in LATIN_TO_ARMENIAN:
+            result.append(LATIN_TO_ARMENIAN[pair])
+            i += 2
+        else:
+            result.append(LATIN_TO_ARMENIAN.get(text[i], text[i]))
+            i += 1
+    return ''.join(result)
+
+def _grams(text):
+    """All distinct substrings of length 1..GRAM_SIZE"""
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        for i in range(len(text) - size + 1):
+            grams.add(text[i:i + size])
+    return grams
+
+class SearchIndex:
+    """Inverted n-gram index over text columns of the catalog.
+
+    Every row is indexed by all of its 1-, 2- and 3-grams, so a query is answered
+    by intersecting the posting sets of its own n-grams and confirming the
+    substring match on the few remaining candidates. Row positions refer to
+    the order in which rows were added (the DataFrame's positional index).
+    One thread may add_rows while others search; a search can then return
+    positions of the rows being added, beyond the frame the caller holds.
+    """
+
+    def __init__(self, fields=('title', 'author')):
+        self.fields = tuple(fields)
+        self._texts = {field: [] for field in self.fields}
+        self._postings = {field: defaultdict(set) for field in self.fields}
+        self.size = 0
+
+    @classmethod
+    def build(cls, books_df, fields=('title', 'author')):
+        index = cls(fields)
+        index.add_rows(books_df)
+        return index
+
+    def add_rows(self, books_df):
+        """Append rows to the index (positions continue after the rows already indexed)"""
+        for field in self.fields:
+            texts = self._texts[field]
+            postings = self._postings[field]
+            position = self.size
+            for value in books_df[field].tolist():
+                text = normalize_text(value) if isinstance(value, str) else ''
+                texts.append(text)
+                for gram in _grams(text):
+                    postings[gram].add(position)
+                position += 1
+        self.size += len(books_df)
+
+    def _match(self, field, query):
+        texts = self._texts[field]
+        postings = self._postings[field]
+        if len(query) <= GRAM_SIZE:
+            # Copy, the posting set may grow while we iterate
+            candidates = set(postings.get(query, ()))
+        else:
+            gram_sets = []
+            for i in range(len(query) - GRAM_SIZE + 1):
+                gram_set = postings.get(query[i:i + GRAM_SIZE])
+                if not gram_set:
+                    return []
+                gram_sets.append(gram_set)
+            gram_sets.sort(key=len)
+            candidates = set(gram_sets[0])
+            for gram_set in gram_sets[1:]:
+                candidates &= gram_set
+                if not candidates:
+                    return []
+
+        ranked = []
+        for position in candidates:
+            text = texts[position]
+            offset = text.find(query)
+            if offset < 0:
+                continue
+            if offset == 0:
+                rank = 0
+            elif not text[offset - 1].isalnum():
+                rank = 1
+            else:
+                rank = 2
+            ranked.append((rank, offset, len(text), position))
+        ranked.sort()
+        return [position for _, _, _, position in ranked]
+
+    def search(self, field, query, transliterate=True):
+        """Return row positions whose field contains query, best matches first.
+
+        Prefix matches rank above word-start matches, which rank above matches in
+        the middle of a word. A Latin query also matches its Armenian transliteration.
+        """
+        query = normalize_text(query).strip()
+        if not query:
+            return list(range(self.size))
+        hits = self._match(field, query)
+        if transliterate and query.isascii():
+            armenian = transliterate_latin(query)
+            if armenian != query:
+                seen = set(hits)
+                hits += [position for position in self._match(field, armenian) if position not in seen]
+        return hits
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+SESSION_TTL = int(os.getenv('SESSION_TTL', 7 * 24 * 60 * 60))
+SESSION_SECRET_FILE = os.getenv('SESSION_SECRET_FILE', os.path.join('data', 'session_secret'))
+REVOKED_TOKENS_FILE = os.getenv('REVOKED_TOKENS_FILE', os.path.join('data', 'revoked_tokens.json'))
+
+# Profile fields carried inside the token so a reload needs no users lookup
+TOKEN_USER_FIELDS = (
+    'id', 'username', 'email', 'reading_speed', 'daily_reading_time',
+    'preferred_genres', 'preferred_language', 'created_at'
+)
+
+_secret = None
+_revoked = {}  # jti -> exp
+_revoked_mtime = None
+_revoked_checked = 0.0
+_lock = threading.Lock()
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _read_secret_file():
+    try:
+        with open(SESSION_SECRET_FILE, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def _create_secret_file():
+    """Write a random secret to a temp file and hard-link it into place; returns the secret that won.
+
+    Readers never see a partly written file, and when another process links its
+    file first, that one is read back and used.
+    """
+    secret = secrets.token_hex(32)
+    secret_dir = os.path.dirname(SESSION_SECRET_FILE) or '.'
+    os.makedirs(secret_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=secret_dir, prefix='.session_secret.')  # created 0600
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secret)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp_path, SESSION_SECRET_FILE)
+        except FileExistsError:
+            return _read_secret_file()
+    finally:
+        os.unlink(tmp_path)
+    return secret
+
+def _get_secret():
+    """SESSION_SECRET from the environment, or a random key generated once and kept in the data dir"""
+    global _secret
+    if _secret is None:
+        secret = os.getenv('SESSION_SECRET') or _read_secret_file() or _create_secret_file()
+        if not secret:
+            raise RuntimeError(f"{SESSION_SECRET_FILE} is empty; delete it to generate a new secret or set SESSION_SECRET")
+        _secret = secret.encode()
+    return _secret
+
+def _sign(body):
+    return _b64encode(hmac.new(_get_secret(), body.encode('ascii'), hashlib.sha256).digest())
+
+def issue_token(user, ttl=SESSION_TTL):
+    """Create a signed token carrying the user's profile, valid for ttl seconds"""
+    profile = {field: user.get(field) for field in TOKEN_USER_FIELDS}
+    if profile['created_at'] is not None:
+        profile['created_at'] = str(profile['created_at'])
+    payload = {'u': profile, 'exp': int(time.time()) + ttl, 'jti': secrets.token_urlsafe(8)}
+    body = _b64encode(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return f"{body}.{_sign(body)}"
+
+def _decode(token):
+    try:
+        body, signature = token.split('.')
+        if not hmac.compare_digest(signature, _sign(body)):
+            return None
+        payload = json.loads(_b64decode(body))
+    except (ValueError, TypeError):
+        return None
+    if payload['exp'] < time.time():
+        return None
+    return payload
+
+def read_token(token):
+    """Return the user stored in a valid, unexpired, unrevoked token, else None"""
+    payload = _decode(token)
+    if payload is None or _is_revoked(payload['jti']):
+        return None
+    return payload['u']
+
+def _load_revoked():
+    global _revoked_mtime
+    try:
+        mtime = os.path.getmtime(REVOKED_TOKENS_FILE)
+        if mtime == _revoked_mtime:
+            return
+        with open(REVOKED_TOKENS_FILE, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return
+    _revoked.update(stored)
+    _revoked_mtime = mtime
+
+def _is_revoked(jti):
+    global _revoked_checked
+    with _lock:
+        # Revocations from other processes are picked up at most once per second
+        if time.monotonic() - _revoked_checked >= 1:
+            _revoked_checked = time.monotonic()
+            _load_revoked()
+        return jti in _revoked
+
+def revoke_token(token):
+    """Revoke a token until it would have expired anyway; expired entries are pruned"""
+    global _revoked_mtime
+    payload = _decode(token) if token else None
+    if payload is None:
+        return
+    with _lock:
+        _load_revoked()
+        now = time.time()
+        for jti in [jti for jti, exp in _revoked.items() if exp < now]:
+            del _revoked[jti]
+        _revoked[payload['jti']] = payload['exp']
+        try:
+            os.makedirs(os.path.dirname(REVOKED_TOKENS_FILE) or '.', exist_ok=True)
+            tmp_path = f"{REVOKED_TOKENS_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(_revoked, f)
+            os.replace(tmp_path, REVOKED_TOKENS_FILE)
+            _revoked_mtime = os.path.getmtime(REVOKED_TOKENS_FILE)
+        except OSError as e:
+            print(f"Error saving revoked session tokens: {e}")
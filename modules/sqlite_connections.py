@@ -0,0 +1,47 @@
+import queue
+import threading
+import weakref
+
+class ThreadConnections:
+    """One SQLite connection per thread, handed on to a new thread once its thread is gone.
+
+    Streamlit runs most reruns on a new script thread, so a plain threading.local
+    would open and set up a connection on nearly every rerun. connect must open
+    connections with check_same_thread=False; each is still used by one live
+    thread at a time. setup (e.g. the schema) runs once per process, on the first
+    connection.
+    """
+
+    def __init__(self, connect, setup=None):
+        self._connect = connect
+        self._setup = setup
+        self._local = threading.local()
+        # SimpleQueue is safe to use from the finalizer, whichever thread it runs on
+        self._idle = queue.SimpleQueue()
+        self._setup_lock = threading.Lock()
+        self._ready = setup is None
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            weakref.finalize(threading.current_thread(), self._release, conn)
+            self._local.conn = conn
+        return conn
+
+    def _open(self):
+        conn = self._connect()
+        if not self._ready:
+            with self._setup_lock:
+                if not self._ready:
+                    self._setup(conn)
+                    self._ready = True
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
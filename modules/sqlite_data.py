@@ -0,0 +1,409 @@
+import os
+import sqlite3
+from datetime import datetime
+from modules.profiler import instrument
+from modules.sqlite_connections import ThreadConnections
+from modules.works_search import index_work, index_work_comment
+from modules.reminders import days_to_mask, mask_to_days, format_reminder_time, is_due, notify_reminder_changed
+
+SQLITE_DB = os.getenv('SQLITE_DB', os.path.join('data', 'reading_app.db'))
+
+# Characters of content shown in the community feed before a work is opened
+WORK_SNIPPET_LENGTH = 200
+
+SESSION_COLUMNS = ('id', 'user_id', 'book_id', 'book_title', 'pages_read', 'session_duration', 'created_at')
+# Columns the history view needs
+SESSION_HISTORY_COLUMNS = ('id', 'book_title', 'pages_read', 'session_duration', 'created_at')
+
+# Same tables as the MySQL schema minus users, which stay with auth.
+# INTEGER PRIMARY KEY ids grow with time, so (x, id) indexes serve the
+# newest-first pages and keyset cursors without a created_at column in the index.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading_sessions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    book_id TEXT NOT NULL,
+    book_title TEXT,
+    pages_read INTEGER,
+    session_duration INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON reading_sessions (user_id, id);
+
+CREATE TABLE IF NOT EXISTS user_reading_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_sessions INTEGER NOT NULL DEFAULT 0,
+    total_pages INTEGER NOT NULL DEFAULT 0,
+    total_minutes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS book_comments (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    book_id TEXT NOT NULL,
+    comment_text TEXT,
+    rating INTEGER,
+    username TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_book_comments_book ON book_comments (book_id, id);
+
+CREATE TABLE IF NOT EXISTS creative_works (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    content_type TEXT,
+    content TEXT,
+    genre TEXT,
+    description TEXT,
+    is_public INTEGER DEFAULT 1,
+    username TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_works_user ON creative_works (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_works_public ON creative_works (is_public, id);
+
+CREATE TABLE IF NOT EXISTS creative_work_comments (
+    id INTEGER PRIMARY KEY,
+    creative_work_id INTEGER NOT NULL REFERENCES creative_works(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    comment_text TEXT,
+    username TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_comments_work ON creative_work_comments (creative_work_id, id);
+
+CREATE TABLE IF NOT EXISTS reading_reminders (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL UNIQUE,
+    reminder_time TEXT NOT NULL,
+    days_mask INTEGER NOT NULL DEFAULT 127,
+    is_active INTEGER DEFAULT 1,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_active ON reading_reminders (is_active);
+"""
+
+def _dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+def _connect():
+    os.makedirs(os.path.dirname(SQLITE_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(SQLITE_DB, timeout=10, check_same_thread=False)
+    conn.row_factory = _dict_factory
+    # WAL lets readers run alongside the single writer; NORMAL is durable at checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+_connections = ThreadConnections(_connect, lambda conn: conn.executescript(SCHEMA))
+
+def get_connection():
+    """Connection of the current thread, reused across reruns; the schema is created once per process"""
+    return _connections.get()
+
+def _now():
+    return str(datetime.now())
+
+# Reading Sessions
+def add_reading_session(user_id, book_id, pages_read, session_duration, book_title):
+    """Add reading session and update the user's statistics rollup in the same transaction"""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO reading_sessions (user_id, book_id, book_title, pages_read, session_duration, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, str(book_id), book_title, pages_read, session_duration, _now())
+            )
+            conn.execute("""
+            INSERT INTO user_reading_stats (user_id, total_sessions, total_pages, total_minutes)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+            total_sessions = total_sessions + 1,
+            total_pages = total_pages + excluded.total_pages,
+            total_minutes = total_minutes + excluded.total_minutes
+            """, (user_id, pages_read, session_duration))
+        return True
+    except sqlite3.Error as e:
+        print(f"Error adding reading session: {e}")
+        return False
+
+def get_user_sessions(user_id, limit=None):
+    """Get user's reading sessions, newest first"""
+    try:
+        query = "SELECT * FROM reading_sessions WHERE user_id = ? ORDER BY id DESC LIMIT ?"
+        return get_connection().execute(query, (user_id, -1 if limit is None else limit)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting user sessions: {e}")
+        return []
+
+def get_user_sessions_page(user_id, limit=10, cursor=None, columns=SESSION_HISTORY_COLUMNS):
+    """Get one page of the user's reading history, newest first.
+
+    cursor is the (created_at, id) of the last row of the previous page; ids grow
+    with time here, so only the id part is used. Returns (sessions, next_cursor).
+    """
+    columns = [c for c in SESSION_COLUMNS if c in (columns or SESSION_COLUMNS) or c in ('id', 'created_at')]
+    query = f"SELECT {', '.join(columns)} FROM reading_sessions WHERE user_id = ?"
+    params = [user_id]
+    if cursor is not None:
+        query += " AND id < ?"
+        params.append(cursor[1])
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+    try:
+        sessions = get_connection().execute(query, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting user sessions page: {e}")
+        return [], None
+
+    if len(sessions) <= limit:
+        return sessions, None
+    sessions = sessions[:limit]
+    return sessions, (sessions[-1]['created_at'], sessions[-1]['id'])
+
+def _stats_row(user_id, total_sessions=0, total_pages=0, total_minutes=0):
+    return {
+        'user_id': user_id,
+        'total_sessions': total_sessions,
+        'total_pages': total_pages,
+        'total_minutes': total_minutes,
+        'avg_pages_per_hour': total_pages / (total_minutes / 60) if total_minutes > 0 else 0
+    }
+
+def get_user_stats(user_id):
+    """Get the user's reading statistics rollup with one primary key lookup"""
+    try:
+        row = get_connection().execute(
+            "SELECT total_sessions, total_pages, total_minutes FROM user_reading_stats WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        return _stats_row(user_id, **row) if row else _stats_row(user_id)
+    except sqlite3.Error as e:
+        print(f"Error getting user stats: {e}")
+        return _stats_row(user_id)
+
+def rebuild_user_stats(user_id=None):
+    """Recompute the statistics rollup from reading_sessions for one user or everyone"""
+    where = "WHERE user_id = ?" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(f"DELETE FROM user_reading_stats {where}", params)
+            rebuilt = conn.execute(f"""
+            INSERT INTO user_reading_stats (user_id, total_sessions, total_pages, total_minutes)
+            SELECT user_id, COUNT(*), SUM(pages_read), SUM(session_duration)
+            FROM reading_sessions {where}
+            GROUP BY user_id
+            """, params).rowcount
+        return rebuilt
+    except sqlite3.Error as e:
+        print(f"Error rebuilding user stats: {e}")
+        return 0
+
+# Book Comments
+def add_book_comment(user_id, book_id, comment_text, rating, username):
+    """Add book comment"""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO book_comments (user_id, book_id, comment_text, rating, username, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, str(book_id), comment_text, rating, username, _now())
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"Error adding book comment: {e}")
+        return False
+
+def get_book_comments(book_id):
+    """Get comments for a book"""
+    return get_comments_for_books([book_id]).get(book_id, [])
+
+def get_comments_for_books(book_ids):
+    """Get comments for many books with a single query, returns {book_id: [comments]}"""
+    book_ids = list(dict.fromkeys(book_ids))
+    if not book_ids:
+        return {}
+    placeholders = ", ".join(["?"] * len(book_ids))
+    try:
+        rows = get_connection().execute(
+            f"SELECT * FROM book_comments WHERE book_id IN ({placeholders}) ORDER BY id DESC",
+            [str(book_id) for book_id in book_ids]
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting book comments: {e}")
+        rows = []
+
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['book_id'], []).append(row)
+    return {book_id: grouped.get(str(book_id), []) for book_id in book_ids}
+
+# Creative Works
+def add_creative_work(user_id, title, content_type, content, genre, description, is_public, username):
+    """Add creative work"""
+    created_at = _now()
+    try:
+        conn = get_connection()
+        with conn:
+            work_id = conn.execute(
+                "INSERT INTO creative_works (user_id, title, content_type, content, genre, description, is_public, "
+                "username, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, title, content_type, content, genre, description, 1 if is_public else 0, username, created_at)
+            ).lastrowid
+    except sqlite3.Error as e:
+        print(f"Error adding creative work: {e}")
+        return None
+    index_work({
+        'id': work_id, 'user_id': user_id, 'username': username, 'title': title,
+        'content_type': content_type, 'content': content, 'description': description,
+        'is_public': is_public, 'created_at': created_at
+    })
+    return work_id
+
+def get_creative_works(user_id=None, public_only=True):
+    """Get creative works, newest first"""
+    try:
+        conn = get_connection()
+        if user_id:
+            return conn.execute("SELECT * FROM creative_works WHERE user_id = ? ORDER BY id DESC", (user_id,)).fetchall()
+        elif public_only:
+            return conn.execute("SELECT * FROM creative_works WHERE is_public = 1 ORDER BY id DESC").fetchall()
+        else:
+            return conn.execute("SELECT * FROM creative_works ORDER BY id DESC").fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting creative works: {e}")
+        return []
+
+def get_creative_works_feed(exclude_user_id=None, limit=10, cursor=None):
+    """Get one page of public creative works with listing columns only, newest first.
+
+    Returns (works, next_cursor), cursors are (created_at, id).
+    """
+    query = """
+    SELECT w.id, w.user_id, w.username, w.title, w.content_type, w.genre, w.created_at,
+           substr(w.content, 1, ?) AS snippet,
+           (SELECT COUNT(*) FROM creative_work_comments c WHERE c.creative_work_id = w.id) AS comment_count
+    FROM creative_works w
+    WHERE w.is_public = 1
+    """
+    params = [WORK_SNIPPET_LENGTH]
+    if exclude_user_id is not None:
+        query += " AND w.user_id <> ?"
+        params.append(exclude_user_id)
+    if cursor is not None:
+        query += " AND w.id < ?"
+        params.append(cursor[1])
+    query += " ORDER BY w.id DESC LIMIT ?"
+    params.append(limit + 1)
+    try:
+        works = get_connection().execute(query, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting creative works feed: {e}")
+        return [], None
+
+    if len(works) <= limit:
+        return works, None
+    works = works[:limit]
+    return works, (works[-1]['created_at'], works[-1]['id'])
+
+def get_creative_work(work_id):
+    """Get one creative work with its full content"""
+    try:
+        return get_connection().execute("SELECT * FROM creative_works WHERE id = ?", (work_id,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error getting creative work: {e}")
+        return None
+
+def add_creative_work_comment(creative_work_id, user_id, comment_text, username):
+    """Add comment to creative work"""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO creative_work_comments (creative_work_id, user_id, comment_text, username, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (creative_work_id, user_id, comment_text, username, _now())
+            )
+    except sqlite3.Error as e:
+        print(f"Error adding creative work comment: {e}")
+        return False
+    index_work_comment(creative_work_id, comment_text)
+    return True
+
+def get_creative_work_comments(creative_work_id):
+    """Get comments for creative work, oldest first"""
+    try:
+        return get_connection().execute(
+            "SELECT * FROM creative_work_comments WHERE creative_work_id = ? ORDER BY id ASC", (creative_work_id,)
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error getting creative work comments: {e}")
+        return []
+
+# Reminders
+def _decode_reminder(row):
+    """Add days_of_week names for the UI; there is no users table here, so no e-mail"""
+    row['days_of_week'] = mask_to_days(row['days_mask'])
+    row['is_active'] = bool(row['is_active'])
+    row['email'] = None
+    return row
+
+def add_reminder(user_id, reminder_time, days_of_week, is_active=True):
+    """Add or replace the user's reading reminder"""
+    try:
+        reminder_time = format_reminder_time(reminder_time)
+        conn = get_connection()
+        with conn:
+            conn.execute("""
+            INSERT INTO reading_reminders (user_id, reminder_time, days_mask, is_active, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+            reminder_time = excluded.reminder_time,
+            days_mask = excluded.days_mask,
+            is_active = excluded.is_active
+            """, (user_id, reminder_time, days_to_mask(days_of_week), 1 if is_active else 0, _now()))
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error adding reminder: {e}")
+        return False
+    notify_reminder_changed(get_user_reminder(user_id))
+    return True
+
+def get_user_reminder(user_id):
+    """Get user's reminder"""
+    try:
+        reminder = get_connection().execute(
+            "SELECT user_id, reminder_time, days_mask, is_active FROM reading_reminders WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return _decode_reminder(reminder) if reminder else None
+    except sqlite3.Error as e:
+        print(f"Error getting user reminder: {e}")
+        return None
+
+def get_active_reminders():
+    """Get every active reminder, for the scheduler"""
+    reminders = get_connection().execute(
+        "SELECT user_id, reminder_time, days_mask, is_active FROM reading_reminders WHERE is_active = 1"
+    ).fetchall()
+    return [_decode_reminder(reminder) for reminder in reminders]
+
+def check_reminder_time(user_id):
+    """Check if the user's reminder window (lead minutes before reading time) is open now"""
+    return is_due(get_user_reminder(user_id))
+
+def flush_writes():
+    """Same interface as mysql_data.flush_writes; writes here are never deferred"""
+    return True
+
+# Concurrent fetching
+def fetch_concurrently(**calls):
+    """Same interface as mysql_data.fetch_concurrently; local reads take microseconds, so they just run in turn"""
+    return {name: call() for name, call in calls.items()}
+
+# Time every public data function when PROFILE=1
+instrument(globals(), query=True, exclude=('fetch_concurrently', 'get_connection'))
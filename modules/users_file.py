@@ -2,48 +2,77 @@ import streamlit as st
 import json
 import os
 from datetime import datetime
-from modules.mysql_data import get_user_sessions, add_reminder, get_user_reminder, check_reminder_time
+from functools import partial
+from modules.repository import get_user_sessions_page, get_user_stats, add_reminder, get_user_reminder, fetch_concurrently
+from modules.auth_file import update_user_preferences, refresh_session
+from modules.reminders import DAY_NAMES, is_due, parse_reminder_time
 from modules.utils import calculate_reading_plan
+from modules.profiler import timed
 
+HISTORY_PAGE_SIZE = 10
+
+@timed()
 def show_statistics(user):
     st.subheader("📊 Իմ Ընթերցման Վիճակագրությունը")
     
-    sessions = get_user_sessions(user['id'])
+    history = st.session_state.get('session_history')
+    first_page = None
+    if history and history['user_id'] == user['id']:
+        stats = get_user_stats(user['id'])
+    else:
+        # Nothing loaded for this user yet: fetch the totals and the first history page together
+        fetched = fetch_concurrently(
+            stats=partial(get_user_stats, user['id']),
+            first_page=partial(get_user_sessions_page, user['id'], HISTORY_PAGE_SIZE)
+        )
+        stats, first_page = fetched['stats'], fetched['first_page']
     
-    if sessions:
-        # Convert to DataFrame for easier analysis
-        import pandas as pd
-        sessions_df = pd.DataFrame(sessions)
-        
+    if stats['total_sessions']:
         # Basic statistics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_sessions = len(sessions_df)
-            st.metric("📖 Ընդհանուր Ընթերցումներ", total_sessions)
+            st.metric("📖 Ընդհանուր Ընթերցումներ", stats['total_sessions'])
         
         with col2:
-            total_pages = sessions_df['pages_read'].sum()
-            st.metric("📄 Ընդհանուր Էջեր", total_pages)
+            st.metric("📄 Ընդհանուր Էջեր", stats['total_pages'])
         
         with col3:
-            total_time = sessions_df['session_duration'].sum()
+            total_time = stats['total_minutes']
             hours = total_time // 60
             minutes = total_time % 60
             st.metric("⏱️ Ընդհանուր Ժամանակ", f"{hours}ժ {minutes}ր")
         
         with col4:
-            avg_speed = total_pages / (total_time / 60) if total_time > 0 else 0
-            st.metric("🚀 Միջին Արագություն", f"{avg_speed:.1f} էջ/ժամ")
+            st.metric("🚀 Միջին Արագություն", f"{stats['avg_pages_per_hour']:.1f} էջ/ժամ")
         
-        # Recent sessions
+        # Recent sessions, loaded one page at a time
         st.subheader("🕒 Վերջին Ընթերցումները")
-        for session in sessions[:10]:
+        if not history or history['user_id'] != user['id'] or history['total_sessions'] != stats['total_sessions']:
+            sessions, cursor = first_page or get_user_sessions_page(user['id'], HISTORY_PAGE_SIZE)
+            history = {'user_id': user['id'], 'total_sessions': stats['total_sessions'], 'sessions': sessions, 'cursor': cursor}
+            st.session_state.session_history = history
+        
+        for session in history['sessions']:
             st.write(f"- **{session['book_title']}** - {session['pages_read']} էջ ({session['session_duration']} րոպե) - {session['created_at']}")
+        
+        if history['cursor'] is not None and st.button("⬇️ Բեռնել Ավելին", key="load_more_sessions"):
+            sessions, cursor = get_user_sessions_page(user['id'], HISTORY_PAGE_SIZE, history['cursor'])
+            history['sessions'].extend(sessions)
+            history['cursor'] = cursor
+            st.rerun()
     
     else:
         st.info("📝 Դեռ չունեք ընթերցման տվյալներ։ Սկսեք ընթերցել և ավելացրեք ձեր առաջին ընթերցումը։")
 
+def is_valid_reminder_time(value):
+    try:
+        parse_reminder_time(value)
+        return True
+    except ValueError:
+        return False
+
+@timed()
 def show_reminders(user):
     st.subheader("⏰ Ընթերցման Հիշեցումներ")
     
@@ -68,7 +97,7 @@ def show_reminders(user):
         
         with col2:
             # Days of week selection
-            days_options = ["Երկուշաբթի", "Երեքշաբթի", "Չորեքշաբթի", "Հինգշաբթի", "Ուրբաթ", "Շաբաթ", "Կիրակի"]
+            days_options = DAY_NAMES
             default_days = existing_reminder['days_of_week'] if existing_reminder else days_options
             selected_days = st.multiselect(
                 "📅 Օրեր",
@@ -91,6 +120,8 @@ def show_reminders(user):
                 st.error("❌ Խնդրում եմ ընտրել առնվազն մեկ օր")
             elif not reminder_time:
                 st.error("❌ Խնդրում եմ մուտքագրել ժամանակ")
+            elif not is_valid_reminder_time(reminder_time):
+                st.error("❌ Ժամանակը պետք է լինի ԺԺ:ՐՐ ձևաչափով (օրինակ՝ 20:00)")
             else:
                 success = add_reminder(user['id'], reminder_time, selected_days, is_active)
                 if success:
@@ -125,7 +156,7 @@ def show_reminders(user):
         """)
         
         # Check if reminder should be shown now
-        if check_reminder_time(user['id']):
+        if is_due(current_reminder):
             st.warning("""
             **🔔 Ընթերցման Ժամանակն է!**
             
@@ -148,6 +179,7 @@ def show_reminders(user):
         կանոնավոր ընթերցման սովորություն ձևավորելու համար:
         """)
 
+@timed()
 def show_settings(user, books_df):
     st.subheader("⚙️ Օգտատիրոջ Կարգավորումներ")
     
@@ -189,29 +221,11 @@ def show_settings(user, books_df):
     )
     
     if st.button("💾 Պահպանել Կարգավորումները"):
-        try:
-            # Load current users
-            from modules.auth_file import load_users, save_users
-            users = load_users()
-            
-            if user['username'] in users:
-                # Update user preferences
-                users[user['username']]['reading_speed'] = new_reading_speed
-                users[user['username']]['daily_reading_time'] = new_daily_time
-                users[user['username']]['preferred_genres'] = new_preferred_genres
-                users[user['username']]['preferred_language'] = new_preferred_language
-                
-                save_users(users)
-                
-                # Update session state
-                st.session_state.user = users[user['username']].copy()
-                st.session_state.user['username'] = user['username']
-                st.session_state.user['id'] = user['username']
-                
-                st.success("✅ Կարգավորումները պահպանված են!")
-                st.rerun()
-            else:
-                st.error("❌ Օգտատերը չի գտնվել")
-                
-        except Exception as e:
-            st.error(f"❌ Սխալ կարգավորումները պահպանելիս: {e}")
+        profile = update_user_preferences(
+            user['id'], new_reading_speed, new_daily_time, new_preferred_genres, new_preferred_language
+        )
+        if profile:
+            # New token so a reload restores the updated preferences too
+            refresh_session(profile)
+            st.success("✅ Կարգավորումները պահպանված են!")
+            st.rerun()
@@ -1,5 +1,16 @@
 import requests
+import numpy as np
+from modules.profiler import timed
 
+# Score weights used by get_advanced_recommendations, they add up to 100
+RECOMMENDATION_WEIGHTS = {
+    'genre': 40,
+    'pages': 20,
+    'language': 15,
+    'time': 25
+}
+
+@timed()
 def check_link_availability(url):
     """Ստուգել հղումի հասանելիությունը"""
     try:
@@ -67,40 +78,54 @@ def get_reading_time_recommendation(genre):
         'reason': 'Այս գիրքը հարմար է ընթերցման ցանկացած ժամանակ'
     })
 
-def get_advanced_recommendations(books_df, user_preferences):
+@timed()
+def score_books(books_df, user_preferences, weights=None):
+    """Score every book against the user's preferences, returns an array aligned with books_df rows"""
+    weights = {**RECOMMENDATION_WEIGHTS, **(weights or {})}
+    pages = books_df['pages'].to_numpy(dtype=float)
+    scores = np.zeros(len(books_df))
+    
+    # Genre match (40%)
+    preferred_genres = user_preferences.get('preferred_genres', [])
+    scores += weights['genre'] * books_df['genre'].isin(preferred_genres).to_numpy()
+    
+    # Page count suitability (20%)
+    preferred_pages = user_preferences.get('preferred_page_range', [100, 300])
+    scores += weights['pages'] * ((pages >= preferred_pages[0]) & (pages <= preferred_pages[1]))
+    
+    # Language preference (15%)
+    preferred_language = user_preferences.get('preferred_language', 'Հայերեն')
+    scores += weights['language'] * (books_df['language'] == preferred_language).to_numpy()
+    
+    # Reading time feasibility (25%)
+    reading_speed = user_preferences.get('reading_speed', 2)
+    daily_time = user_preferences.get('daily_reading_time', 30)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimated_time = pages / reading_speed
+    scores += weights['time'] * (estimated_time <= daily_time * 7)  # 1 week
+    
+    return scores
+
+def top_k_indices(scores, k):
+    """Positions of the k highest scores, ordered like a stable descending sort"""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.array([], dtype=int)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    # argpartition finds the k-th best score; keep everything above it plus the
+    # earliest rows tied with it, so ties resolve in catalog order
+    kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > kth_score)
+    ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+@timed()
+def get_advanced_recommendations(books_df, user_preferences, weights=None, k=5):
     """Get advanced book recommendations"""
     if books_df.empty:
         return books_df
     
-    recommendations = []
-    
-    for _, book in books_df.iterrows():
-        score = 0
-        
-        # Genre match (40%)
-        preferred_genres = user_preferences.get('preferred_genres', [])
-        if book['genre'] in preferred_genres:
-            score += 40
-        
-        # Page count suitability (20%)
-        preferred_pages = user_preferences.get('preferred_page_range', [100, 300])
-        if preferred_pages[0] <= book['pages'] <= preferred_pages[1]:
-            score += 20
-        
-        # Language preference (15%)
-        if book['language'] == user_preferences.get('preferred_language', 'Հայերեն'):
-            score += 15
-        
-        # Reading time feasibility (25%)
-        reading_speed = user_preferences.get('reading_speed', 2)
-        daily_time = user_preferences.get('daily_reading_time', 30)
-        estimated_time = book['pages'] / reading_speed
-        
-        if estimated_time <= daily_time * 7:  # 1 week
-            score += 25
-        
-        recommendations.append((book, score))
-    
-    # Sort by score and return top recommendations
-    recommendations.sort(key=lambda x: x[1], reverse=True)
-    return [book for book, score in recommendations[:5]]
+    scores = score_books(books_df, user_preferences, weights)
+    return [books_df.iloc[position] for position in top_k_indices(scores, k)]
@@ -0,0 +1,117 @@
+import os
+import re
+import sqlite3
+from modules.sqlite_connections import ThreadConnections
+
+WORKS_SEARCH_DB = os.getenv('WORKS_SEARCH_DB', os.path.join('data', 'works_search.db'))
+
+# Column weights for bm25: title, description, content, comments
+RANK_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+    title, description, content, comments,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS works_meta (
+    work_id INTEGER PRIMARY KEY,
+    user_id INTEGER,
+    username TEXT,
+    content_type TEXT,
+    is_public INTEGER,
+    created_at TEXT
+);
+"""
+
+def _connect():
+    os.makedirs(os.path.dirname(WORKS_SEARCH_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(WORKS_SEARCH_DB, timeout=5, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+_connections = ThreadConnections(_connect, lambda conn: conn.executescript(SCHEMA))
+
+def get_search_connection():
+    """Connection of the current thread to the SQLite FTS5 side index, reused across reruns"""
+    return _connections.get()
+
+def _build_match(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r'\w+', query)
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def index_work(work, comments=()):
+    """Add or replace a creative work in the search index"""
+    try:
+        conn = get_search_connection()
+        with conn:
+            conn.execute("DELETE FROM works_fts WHERE rowid = ?", (work['id'],))
+            conn.execute(
+                "INSERT INTO works_fts (rowid, title, description, content, comments) VALUES (?, ?, ?, ?, ?)",
+                (work['id'], work['title'], work.get('description') or '', work['content'],
+                 ' '.join(c['comment_text'] for c in comments))
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO works_meta (work_id, user_id, username, content_type, is_public, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (work['id'], work['user_id'], work['username'], work['content_type'],
+                 1 if work['is_public'] else 0, str(work.get('created_at') or ''))
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"Error indexing creative work: {e}")
+        return False
+
+def index_work_comment(work_id, comment_text):
+    """Append a comment's text to its work's searchable comments"""
+    try:
+        conn = get_search_connection()
+        with conn:
+            conn.execute(
+                "UPDATE works_fts SET comments = comments || ' ' || ? WHERE rowid = ?",
+                (comment_text, work_id)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"Error indexing creative work comment: {e}")
+        return False
+
+def rebuild_works_index(works, comments_by_work):
+    """Recreate the whole index from the primary store, returns the number of indexed works"""
+    conn = get_search_connection()
+    with conn:
+        conn.execute("DELETE FROM works_fts")
+        conn.execute("DELETE FROM works_meta")
+    for work in works:
+        index_work(work, comments_by_work.get(work['id'], []))
+    return len(works)
+
+def search_works(query, user_id=None, limit=10, offset=0):
+    """Ranked full-text search over public works (and the caller's own).
+
+    Title and snippet come back with matches wrapped in ** for markdown.
+    Returns (results, has_more).
+    """
+    match = _build_match(query)
+    if not match:
+        return [], False
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    sql = f"""
+    SELECT m.work_id, m.user_id, m.username, m.content_type, m.created_at,
+           highlight(works_fts, 0, '**', '**') AS title,
+           snippet(works_fts, -1, '**', '**', '…', 24) AS snippet,
+           bm25(works_fts, {weights}) AS rank
+    FROM works_fts JOIN works_meta m ON m.work_id = works_fts.rowid
+    WHERE works_fts MATCH ? AND (m.is_public = 1 OR m.user_id = ?)
+    ORDER BY rank
+    LIMIT ? OFFSET ?
+    """
+    try:
+        rows = get_search_connection().execute(sql, (match, user_id, limit + 1, offset)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error searching creative works: {e}")
+        return [], False
+    results = [dict(row) for row in rows[:limit]]
+    return results, len(rows) > limit
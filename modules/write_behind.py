@@ -0,0 +1,190 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+# Off by default: every insert commits on its own, as before
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', '0') == '1'
+WRITE_BEHIND_BATCH = int(os.getenv('WRITE_BEHIND_BATCH', 100))
+WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', 1.0))
+# Callers wait for the batch holding their row, so a rerun reads its own writes;
+# concurrent callers still share one batch (group commit)
+WRITE_BEHIND_SYNC = os.getenv('WRITE_BEHIND_SYNC', '1') == '1'
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', 3))
+
+_queues = {}
+
+class _Entry:
+    __slots__ = ('item', 'queued_at', 'attempts', 'done', 'ok')
+
+    def __init__(self, item, wait):
+        self.item = item
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+        self.done = threading.Event() if wait else None
+        self.ok = False
+
+class WriteBehindQueue:
+    """Collects rows and hands them to write_batch(rows) in groups.
+
+    A background thread flushes when batch_size rows are queued, when the
+    oldest row has waited interval seconds, or right away when a caller
+    waits for its row. A failed batch is rewritten row by row, so only the
+    rows that fail on their own are retried, up to max_attempts times
+    (waiting callers get False at once). Pending rows are drained at exit.
+    """
+
+    def __init__(self, name, write_batch, batch_size=WRITE_BEHIND_BATCH, interval=WRITE_BEHIND_INTERVAL,
+                 max_attempts=WRITE_BEHIND_MAX_ATTEMPTS):
+        self.name = name
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._entries = deque()
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        _queues[name] = self
+        atexit.register(self.close)
+
+    def submit(self, item, wait=False):
+        """Queue one row; with wait=True block until its batch is committed and return whether it was"""
+        entry = _Entry(item, wait)
+        with self._cond:
+            if self._closed:
+                return self._flush([entry])
+            self._entries.append(entry)
+            self.enqueued += 1
+            if wait:
+                self._waiting += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f'write-behind-{self.name}', daemon=True)
+                self._thread.start()
+            if wait or len(self._entries) >= self.batch_size:
+                self._cond.notify()
+        if wait:
+            entry.done.wait()
+            return entry.ok
+        return True
+
+    def _take(self, limit):
+        # Caller holds self._cond
+        batch = [self._entries.popleft() for _ in range(min(limit, len(self._entries)))]
+        self._waiting -= sum(1 for entry in batch if entry.done is not None)
+        return batch
+
+    def _ready(self):
+        if self._closed or self._waiting or len(self._entries) >= self.batch_size:
+            return True
+        return bool(self._entries) and time.monotonic() - self._entries[0].queued_at >= self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready():
+                    timeout = None
+                    if self._entries:
+                        timeout = max(self.interval - (time.monotonic() - self._entries[0].queued_at), 0.01)
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                batch = self._take(self.batch_size)
+            self._flush(batch)
+
+    def _write(self, items):
+        try:
+            self.write_batch(items)
+            return True
+        except Exception as e:
+            print(f"Error writing {self.name} batch of {len(items)}: {e}")
+            return False
+
+    def _flush(self, batch):
+        if not batch:
+            return True
+        started = time.perf_counter()
+        batch_ok = self._write([entry.item for entry in batch])
+        if batch_ok:
+            results = [True] * len(batch)
+        elif len(batch) == 1:
+            results = [False]
+        else:
+            # One bad row (e.g. a foreign key to a deleted work) must not sink the
+            # rest, so write them one at a time and reject only the ones that fail
+            results = [self._write([entry.item]) for entry in batch]
+        elapsed = time.perf_counter() - started
+        retry = []
+        with self._cond:
+            self.batches += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+            if not batch_ok:
+                self.failed_batches += 1
+            for entry, ok in zip(batch, results):
+                if ok:
+                    self.written += 1
+                    continue
+                entry.attempts += 1
+                if entry.done is None and entry.attempts < self.max_attempts and not self._closed:
+                    entry.queued_at = time.monotonic()
+                    retry.append(entry)
+                elif entry.done is None:
+                    self.dropped += 1
+            # Retried rows go back to the front and wait another interval
+            self._entries.extendleft(reversed(retry))
+        for entry, ok in zip(batch, results):
+            if entry.done is not None:
+                entry.ok = ok
+                entry.done.set()
+        return all(results)
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        ok = True
+        while True:
+            with self._cond:
+                batch = self._take(self.batch_size)
+            if not batch:
+                return ok
+            ok = self._flush(batch) and ok
+
+    def close(self):
+        """Stop the background thread and drain the queue"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        return self.flush()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._entries),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'dropped': self.dropped,
+                'flush_seconds_total': self.flush_seconds_total,
+                'flush_seconds_max': self.flush_seconds_max,
+                'flush_seconds_avg': self.flush_seconds_total / self.batches if self.batches else 0.0
+            }
+
+def write_behind_stats():
+    """Queue depth and flush latency of every write-behind queue, by name"""
+    return {name: queue.stats() for name, queue in _queues.items()}
+
+def flush_all():
+    """Write out every queue now"""
+    return all([queue.flush() for queue in list(_queues.values())])